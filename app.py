@@ -1,17 +1,25 @@
 # --- IMPORTS ---
-import pandas as pd
-from flask import Flask, render_template, request, redirect, url_for, flash
+import time
+_import_started = time.perf_counter()
+from flask import Flask, render_template, request, redirect, url_for, flash, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3
-from sentence_transformers import SentenceTransformer, util
-import pickle
-import torch
 from concurrent.futures import ThreadPoolExecutor
-from scrapers import youtube_scraper, coursera_scraper
-import re
-from models import User, get_user_by_id, get_user_by_username
+from models import (User, get_user_by_id, get_user_by_username, create_user, update_user_profile, get_saved_jobs, save_job_for_user,
+                    get_materialized_recommendations, save_materialized_recommendations, delete_materialized_recommendations)
+import base64
+import hashlib
+import json
 import os
+import threading
+import catalog_store
+import job_filters
+import recommender
+import skill_index
+import tracing
+from roadmap_cache import RoadmapCache
+from embedding_cache import EmbeddingCache
+from encoder_service import BatchingEncoder
 
 # --- APP & LOGIN MANAGER SETUP ---
 app = Flask(__name__)
@@ -21,70 +29,231 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+@app.before_request
+def begin_trace():
+    g.trace_started = tracing.begin_request()
+
+@app.teardown_request
+def end_trace(exc):
+    tracing.end_request(request.url_rule.rule if request.url_rule else 'unmatched', g.pop('trace_started', None))
+
 @login_manager.user_loader
 def load_user(user_id):
     return get_user_by_id(user_id)
 
 # --- AI DATA LOADING & SKILL SET ---
+# Seconds between checks for a newer catalog written by generate_embeddings.py.
+CATALOG_RELOAD_INTERVAL = float(os.environ.get('PATHFINDER_CATALOG_RELOAD_INTERVAL', 30))
+# 'background' loads the model and catalogs on a warm-up thread while auth routes already serve,
+# 'lazy' waits for the first request that needs them, 'eager' loads them before the app is importable.
+AI_LOAD_MODE = os.environ.get('PATHFINDER_AI_LOAD', 'background')
+
+# Seconds spent in each startup phase; see startup_report.py.
+startup_timings = {}
+
 def load_ai_data():
     print("Loading AI model and all embedding data...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    try:
-        with open('data/job_embeddings.pkl', 'rb') as f: job_data = pickle.load(f)
-        jobs_df, job_embeddings = job_data['df'], job_data['embeddings']
-    except FileNotFoundError:
-        print("FATAL: Job embeddings not found. Run generate_embeddings.py"); jobs_df, job_embeddings = None, None
+    started = time.perf_counter()
+    from sentence_transformers import SentenceTransformer  # pulls in torch, the bulk of a cold start
+    startup_timings['import sentence_transformers'] = time.perf_counter() - started
+    step = time.perf_counter()
+    model = SentenceTransformer(recommender.MODEL_NAME)
+    startup_timings['load model'] = time.perf_counter() - step
+    step = time.perf_counter()
+    job_catalog = recommender.load_job_catalog()
+    startup_timings['load job catalog'] = time.perf_counter() - step
+    step = time.perf_counter()
+    course_catalog = recommender.load_course_catalog()
+    startup_timings['load course catalog'] = time.perf_counter() - step
+    print(f"All AI models and data loaded in {time.perf_counter() - started:.2f}s.")
+    return model, job_catalog, course_catalog
+
+model = job_catalog = course_catalog = None
+_ai_ready, _ai_lock = threading.Event(), threading.Lock()
+
+def ensure_ai_loaded():
+    """Blocks until the model and catalogs are loaded, loading them on this thread if nobody else is."""
+    global model, job_catalog, course_catalog
+    if _ai_ready.is_set(): return
+    with _ai_lock:
+        if _ai_ready.is_set(): return
+        model, job_catalog, course_catalog = load_ai_data()
+        encoder.model = model
+        startup_timings['ready'] = time.perf_counter() - _import_started
+        _ai_ready.set()
+
+def _warm_up():
     try:
-        with open('data/course_embeddings.pkl', 'rb') as f: course_data = pickle.load(f)
-        courses_df, course_embeddings = course_data['df'], course_data['embeddings']
-    except FileNotFoundError:
-        print("WARNING: Static course embeddings not found. Run generate_embeddings.py"); courses_df, course_embeddings = None, None
-    print("All AI models and data loaded.")
-    return model, jobs_df, job_embeddings, courses_df, course_embeddings
+        ensure_ai_loaded()
+    except Exception as e:
+        # The next request that needs the model retries the load and surfaces the error.
+        print(f"Background warm-up failed: {e}")
+
+# Profile queries only change on /edit_profile and roadmap titles repeat, so most encodes are cache hits.
+QUERY_CACHE_SIZE = int(os.environ.get('PATHFINDER_QUERY_CACHE_SIZE', 4096))
+QUERY_CACHE_FILE = os.environ.get('PATHFINDER_QUERY_CACHE_FILE')  # e.g. data/query_embeddings.db to persist
+# Concurrent cache misses from recommend_jobs and get_static_roadmap share one batched forward pass.
+ENCODE_MAX_BATCH_SIZE = int(os.environ.get('PATHFINDER_ENCODE_MAX_BATCH_SIZE', 32))
+ENCODE_MAX_WAIT = float(os.environ.get('PATHFINDER_ENCODE_MAX_WAIT_MS', 5)) / 1000
+encoder = BatchingEncoder(None, max_batch_size=ENCODE_MAX_BATCH_SIZE, max_wait=ENCODE_MAX_WAIT)  # model set by ensure_ai_loaded
+query_cache = EmbeddingCache(encoder.encode, maxsize=QUERY_CACHE_SIZE, persist_path=QUERY_CACHE_FILE, namespace=f"{recommender.MODEL_NAME}:")
+_catalog_reload_lock, _next_catalog_check = threading.Lock(), time.monotonic() + CATALOG_RELOAD_INTERVAL
 
-model, jobs_df, job_embeddings, courses_df, course_embeddings = load_ai_data()
-SKILL_SET = {'python', 'java', 'c++', 'c#', 'javascript', 'typescript', 'html', 'css', 'sql', 'nosql', 'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring boot', 'git', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'linux', 'unix', 'bash', 'powershell', 'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy', 'matplotlib', 'seaborn', 'tableau', 'power bi', 'excel', 'figma', 'sketch', 'adobe xd', 'jira', 'agile', 'scrum', 'rest api', 'graphql', 'machine learning', 'data analysis', 'data visualization', 'devops', 'ci/cd', 'automation', 'testing', 'selenium'}
+@app.before_request
+def reload_catalogs_if_changed():
+    """
+    Hot-reloads the catalogs once generate_embeddings.py has swapped a new version
+    into place. Both are opened before either is swapped in; if one fails to load
+    (e.g. mid-swap or an unsupported format) the current catalogs keep serving
+    and the reload is retried after the next interval.
+    """
+    global job_catalog, course_catalog, _next_catalog_check
+    if not _ai_ready.is_set(): return
+    if time.monotonic() < _next_catalog_check or not _catalog_reload_lock.acquire(blocking=False): return
+    try:
+        _next_catalog_check = time.monotonic() + CATALOG_RELOAD_INTERVAL
+        jobs_version, courses_version = catalog_store.current_version(recommender.JOBS_CATALOG_DIR), catalog_store.current_version(recommender.COURSES_CATALOG_DIR)
+        new_jobs, new_courses = job_catalog, course_catalog
+        if jobs_version and (job_catalog is None or job_catalog.version != jobs_version):
+            print(f"Job catalog changed (version {jobs_version}); reloading."); new_jobs = recommender.load_job_catalog()
+        if courses_version and (course_catalog is None or course_catalog.version != courses_version):
+            print(f"Course catalog changed (version {courses_version}); reloading."); new_courses = recommender.load_course_catalog()
+        if new_jobs is None and job_catalog is not None: raise RuntimeError("job catalog disappeared while reloading")
+        if new_courses is None and course_catalog is not None: raise RuntimeError("course catalog disappeared while reloading")
+        job_catalog, course_catalog = new_jobs, new_courses
+    except Exception as e:
+        print(f"Catalog reload failed, still serving the current catalogs: {e}")
+    finally:
+        _catalog_reload_lock.release()
 
 # --- RECOMMENDATION LOGIC ---
-def recommend_jobs(user_query, top_k=10):
-    if jobs_df is None: return []
-    query_embedding = model.encode(user_query, convert_to_tensor=True)
-    cosine_scores = util.cos_sim(query_embedding, job_embeddings)
-    top_results = torch.topk(cosine_scores, k=min(top_k, len(jobs_df)))
-    recommendations, user_skills_mentioned = [], {skill for skill in SKILL_SET if skill in user_query.lower()}
-    for score, idx_tensor in zip(top_results[0][0], top_results[1][0]):
-        idx = idx_tensor.item()
-        job_details = jobs_df.iloc[idx].to_dict()
-        original_score = score.item()
-        normalized_score = ((original_score + 1) / 2) * 100
-        job_details['similarity_score'] = f"{normalized_score:.2f}"
-        job_text = (str(job_details.get('title', '')) + " " + str(job_details.get('description', ''))).lower()
-        required_skills = {skill for skill in SKILL_SET if skill in job_text}
-        job_details['required_skills'] = sorted(list(required_skills))
-        job_details['skills_gap'] = sorted(list(required_skills - user_skills_mentioned))
-        recommendations.append(job_details)
-    return recommendations
+def recommend_jobs(user_query, top_k=10, keywords=None):
+    """`keywords` (e.g. the user's skills) drive the BM25 half of the hybrid search; defaults to `user_query`."""
+    ensure_ai_loaded()
+    catalog = job_catalog
+    if catalog is None: return []
+    with tracing.span('encode'): query_embedding = query_cache.get(user_query)
+    [(scores, ids)] = recommender.hybrid_search(catalog, [keywords or user_query], query_embedding, min(top_k, len(catalog)))
+    with tracing.span('materialize_results'): return recommender.job_results(catalog, scores, ids, skill_index.MATCHER.mask(user_query))
 
 def get_static_roadmap(job_title, job_profile):
-    if courses_df is None: return []
-    query_embedding = model.encode(job_profile, convert_to_tensor=True)
-    cosine_scores = util.cos_sim(query_embedding, course_embeddings)
-    top_results = torch.topk(cosine_scores, k=min(5, len(courses_df)))
-    ai_roadmap = [courses_df.iloc[idx.item()].to_dict() for score, idx in zip(top_results[0][0], top_results[1][0]) if score.item() > 0.3]
-    keywords = set(re.findall(r'\b\w+\b', job_title.lower()))
-    keyword_roadmap = [course.to_dict() for _, course in courses_df.iterrows() if any(keyword in course['skills_taught'].lower() for keyword in keywords)]
-    final_static_roadmap, seen_links = [], set()
-    for course in ai_roadmap + keyword_roadmap:
-        if course['link'] not in seen_links: final_static_roadmap.append(course); seen_links.add(course['link'])
-    return final_static_roadmap
+    ensure_ai_loaded()
+    catalog = course_catalog
+    if catalog is None: return []
+    with tracing.span('encode'): query_embedding = query_cache.get(job_profile)
+    with tracing.span('static_roadmap'): return recommender.static_roadmap(catalog, job_title, query_embedding)
 
-def get_live_roadmap(query):
+def get_dashboard(user):
+    """
+    The user's recommended jobs and static roadmap. Served from user_recommendations
+    while both the profile and the loaded catalogs are unchanged; recomputed and
+    stored otherwise.
+    """
+    ensure_ai_loaded()
+    profile_query = recommender.build_profile_query(user.degree, user.skills, user.college)
+    profile_version = recommender.profile_version(profile_query)
+    catalog_version = recommender.catalog_version(job_catalog, course_catalog)
+    with tracing.span('dashboard.load_stored'): stored = get_materialized_recommendations(user.id)
+    if stored and stored['profile_version'] == profile_version and stored['catalog_version'] == catalog_version:
+        return stored['recommendations'], stored['static_roadmap']
+
+    with tracing.span('recommend_jobs'): recommended_jobs, static_resources = recommend_jobs(profile_query, keywords=user.skills), []
+    if recommended_jobs:
+        static_resources = get_static_roadmap(recommended_jobs[0]['title'], recommender.top_job_profile(recommended_jobs[0]))
+    with tracing.span('dashboard.store'):
+        save_materialized_recommendations(user.id, profile_version, catalog_version, recommended_jobs, static_resources)
+    return recommended_jobs, static_resources
+
+# --- JOB SEARCH ---
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+REMOTE_VALUES = {'1': 'yes', 'true': 'yes', 'yes': 'yes', '0': 'no', 'false': 'no', 'no': 'no'}
+
+def search_criteria(args):
+    """Filter name -> accepted values from the query string; filters may repeat (?location=Pune&location=Mumbai)."""
+    criteria = {name: [value for value in args.getlist(name) if value.strip()] for name in job_filters.FILTER_COLUMNS}
+    if criteria['remote']:
+        if any(value.lower() not in REMOTE_VALUES for value in criteria['remote']): raise ValueError("remote must be true or false")
+        criteria['remote'] = [REMOTE_VALUES[value.lower()] for value in criteria['remote']]
+    return {name: values for name, values in criteria.items() if values}
+
+class InvalidCursor(ValueError):
+    pass
+
+def search_fingerprint(*parts):
+    """Ties a cursor to the query, filters and catalog version it was issued for."""
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+def encode_cursor(offset, fingerprint):
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset, 'fingerprint': fingerprint}).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, fingerprint):
+    """The offset stored in `cursor`; InvalidCursor if it is malformed or was issued for another search."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise InvalidCursor("malformed cursor") from e
+    offset = data.get('offset') if isinstance(data, dict) else None
+    if type(offset) is not int or offset < 0: raise InvalidCursor("malformed cursor")
+    if data.get('fingerprint') != fingerprint: raise InvalidCursor("cursor does not belong to this search")
+    return offset
+
+def search_jobs(user, query, criteria, cursor=None, limit=SEARCH_PAGE_SIZE, skip_saved=False):
+    """
+    One page of jobs matching `query` (the user's profile when empty) and the
+    structured filters in `criteria`, plus the cursor of the next page or None.
+    """
+    ensure_ai_loaded()
+    catalog = job_catalog
+    if catalog is None: return [], None
+    profile_query = recommender.build_profile_query(user.degree, user.skills, user.college)
+    # The profile ranks the results when `query` is empty, so editing it invalidates outstanding cursors.
+    fingerprint = search_fingerprint(query, recommender.profile_version(profile_query), criteria, skip_saved, catalog.version)
+    offset = decode_cursor(cursor, fingerprint) if cursor else 0
+    with tracing.span('filter'): allowed = job_filters.allowed_ids(catalog.filters, criteria)
+    excluded = None
+    if skip_saved:
+        saved_links = [job['job_link'] for job in get_saved_jobs(user.id)]
+        with tracing.span('filter_saved'): excluded = catalog_store.matching_rows(catalog.link_lookup, job_filters.link_hashes(saved_links))
+    with tracing.span('encode'): query_embedding = query_cache.get(query or profile_query)
+    with tracing.span('search_jobs'):
+        scores, ids, next_offset = recommender.search_jobs(catalog, query or user.skills or profile_query, query_embedding, allowed,
+                                                           offset, limit, excluded)
+    with tracing.span('materialize_results'): jobs = recommender.job_results(catalog, scores, ids, skill_index.MATCHER.mask(profile_query))
+    return jobs, None if next_offset is None else encode_cursor(next_offset, fingerprint)
+
+# --- LIVE ROADMAP (scraped, cached) ---
+ROADMAP_CACHE_TTL = float(os.environ.get('PATHFINDER_ROADMAP_TTL', 6 * 3600))
+ROADMAP_CACHE_STALE_TTL = float(os.environ.get('PATHFINDER_ROADMAP_STALE_TTL', 24 * 3600))
+ROADMAP_CACHE_SIZE = int(os.environ.get('PATHFINDER_ROADMAP_CACHE_SIZE', 1024))
+# Empty scrapes (usually a failed or blocked fetch) are retried after this many seconds.
+ROADMAP_CACHE_EMPTY_TTL = float(os.environ.get('PATHFINDER_ROADMAP_EMPTY_TTL', 60))
+scrape_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='live-scrape')
+
+def scrape_live_roadmap(query):
+    from scrapers import youtube_scraper, coursera_scraper  # selenium is only needed once a scrape runs
     all_resources = []
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        futures = [executor.submit(scraper.scrape, query) for scraper in [youtube_scraper, coursera_scraper]]
-        for future in futures: all_resources.extend(future.result())
+    futures = [scrape_executor.submit(_traced_scrape, scraper, query) for scraper in [youtube_scraper, coursera_scraper]]
+    for future in futures: all_resources.extend(future.result())
     return all_resources
 
+def _traced_scrape(scraper, query):
+    with tracing.span('scrape.' + scraper.__name__.rsplit('.', 1)[-1].replace('_scraper', '')): return scraper.scrape(query)
+
+live_roadmap_cache = RoadmapCache(scrape_live_roadmap, ttl=ROADMAP_CACHE_TTL, stale_ttl=ROADMAP_CACHE_STALE_TTL, maxsize=ROADMAP_CACHE_SIZE,
+                                  empty_ttl=ROADMAP_CACHE_EMPTY_TTL)
+
+def get_live_roadmap(query):
+    """Cached live resources for `query`; None while the first scrape for it is still running."""
+    with tracing.span('live_roadmap_lookup'): return live_roadmap_cache.get(query)
+
+def merge_roadmap(live_resources, static_resources):
+    """Live resources first, then static ones, dropping repeated links."""
+    final_roadmap, seen_links = [], set()
+    for resource in (live_resources or []) + static_resources:
+        if resource['link'] not in seen_links: final_roadmap.append(resource); seen_links.add(resource['link'])
+    return final_roadmap
+
 # --- MAIN ROUTES ---
 @app.route('/')
 def home():
@@ -96,21 +265,15 @@ def home():
         flash('Welcome! Complete your profile to get personalized career recommendations.', 'info')
         return redirect(url_for('edit_profile'))
 
-    profile_query = f"aspiring {user.degree or ''} developer with skills in {user.skills or ''} from {user.college or ''}"
-    recommended_jobs = recommend_jobs(profile_query)
+    with tracing.span('dashboard'): recommended_jobs, static_resources = get_dashboard(user)
     
     final_roadmap, top_job_title = [], "your ideal career"
     if recommended_jobs:
-        top_job = recommended_jobs[0]
-        top_job_title = top_job['title']
-        top_job_profile = top_job['title'] + ". " + top_job['description']
-        live_resources = get_live_roadmap(top_job_title)
-        static_resources = get_static_roadmap(top_job_title, top_job_profile)
-        combined_resources, seen_links = live_resources + static_resources, set()
-        for resource in combined_resources:
-            if resource['link'] not in seen_links: final_roadmap.append(resource); seen_links.add(resource['link'])
-            
-    return render_template('results.html', is_dashboard=True, jobs=recommended_jobs, roadmap_courses=final_roadmap, top_job_title=top_job_title)
+        top_job_title = recommended_jobs[0]['title']
+        final_roadmap = merge_roadmap(get_live_roadmap(top_job_title), static_resources)
+
+    with tracing.span('render'):
+        return render_template('results.html', is_dashboard=True, jobs=recommended_jobs, roadmap_courses=final_roadmap, top_job_title=top_job_title)
 
 # --- AUTHENTICATION ROUTES ---
 @app.route('/register', methods=['GET', 'POST'])
@@ -121,9 +284,7 @@ def register():
         if get_user_by_username(username):
             flash('Username already exists.', 'warning'); return redirect(url_for('register'))
         password_hash = generate_password_hash(password, method='pbkdf2:sha256')
-        conn = sqlite3.connect('database.db')
-        conn.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', (username, password_hash))
-        conn.commit(); conn.close()
+        create_user(username, password_hash)
         flash('Registration successful! Please log in.', 'success'); return redirect(url_for('login'))
     return render_template('register.html')
 
@@ -147,10 +308,7 @@ def logout():
 @app.route('/profile')
 @login_required
 def profile():
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    saved_jobs = conn.execute('SELECT * FROM user_saved_jobs WHERE user_id = ? ORDER BY id DESC', (current_user.id,)).fetchall()
-    conn.close()
+    saved_jobs = get_saved_jobs(current_user.id)
     return render_template('profile.html', user=current_user, saved_jobs=saved_jobs)
 
 @app.route('/edit_profile', methods=['GET', 'POST'])
@@ -158,11 +316,9 @@ def profile():
 def edit_profile():
     if request.method == 'POST':
         form_data = {k: request.form.get(k) for k in ['full_name', 'age', 'city', 'college', 'degree', 'skills']}
-        conn = sqlite3.connect('database.db')
-        conn.execute('''UPDATE users SET full_name = ?, age = ?, city = ?, college = ?, degree = ?, skills = ?
-                        WHERE id = ?''',
-                     (form_data['full_name'], form_data['age'], form_data['city'], form_data['college'], form_data['degree'], form_data['skills'], current_user.id))
-        conn.commit(); conn.close()
+        query_cache.invalidate(recommender.build_profile_query(current_user.degree, current_user.skills, current_user.college))
+        update_user_profile(current_user.id, form_data['full_name'], form_data['age'], form_data['city'], form_data['college'], form_data['degree'], form_data['skills'])
+        delete_materialized_recommendations(current_user.id)
         flash('Profile updated successfully!', 'success'); return redirect(url_for('profile'))
     return render_template('edit_profile.html', user=current_user)
 
@@ -172,11 +328,63 @@ def get_interactive_roadmap():
     job_title = data.get('title')
     if not job_title: return {"error": "Job title is required"}, 400
     live_resources = get_live_roadmap(job_title)
-    static_resources = get_static_roadmap(job_title, job_title)
-    final_roadmap, seen_links = [], set()
-    for resource in live_resources + static_resources:
-        if resource['link'] not in seen_links: final_roadmap.append(resource); seen_links.add(resource['link'])
-    return {"roadmap": final_roadmap}
+    final_roadmap = merge_roadmap(live_resources, get_static_roadmap(job_title, job_title))
+    # live_pending tells the page to ask again once the background scrape has landed.
+    return {"roadmap": final_roadmap, "live_pending": live_resources is None}
+
+@app.route('/api/recommendations')
+@login_required
+def api_recommendations():
+    recommended_jobs, static_resources = get_dashboard(current_user)
+    return {"jobs": recommended_jobs, "static_roadmap": static_resources}
+
+@app.route('/api/search')
+@login_required
+def api_search():
+    """
+    Filtered, paginated job search, e.g.
+    /api/search?q=data+engineer&location=Pune&remote=true&source=LinkedIn&skip_saved=1&limit=20
+    Pass the returned next_cursor back as `cursor` (with the same parameters) for the next page.
+    """
+    try:
+        limit = int(request.args.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+        return {"error": f"limit must be an integer between 1 and {SEARCH_MAX_PAGE_SIZE}"}, 400
+    try:
+        criteria = search_criteria(request.args)
+    except ValueError:
+        return {"error": "remote must be true or false"}, 400
+    skip_saved = request.args.get('skip_saved', '0').lower() in ('1', 'true', 'yes')
+    try:
+        jobs, next_cursor = search_jobs(current_user, request.args.get('q', '').strip(), criteria, request.args.get('cursor'), limit, skip_saved)
+    except InvalidCursor:
+        return {"error": "cursor is malformed or belongs to a different search"}, 400
+    return {"jobs": jobs, "next_cursor": next_cursor}
+
+@app.route('/healthz')
+def healthz():
+    """Liveness plus readiness: 503 until the model and catalogs are loaded, for load balancers during rollouts."""
+    return {"ready": _ai_ready.is_set(), "load_mode": AI_LOAD_MODE}, 200 if _ai_ready.is_set() else 503
+
+@app.route('/api/stats')
+def api_stats():
+    return {"encoder": encoder.stats(), "query_cache": query_cache.stats(), "live_roadmap_cache": live_roadmap_cache.stats()}
+
+# Stats that only ever grow; /metrics exports them as counters, everything else (sizes, queue depth, means) as gauges.
+COUNTER_STATS = {'hits', 'misses', 'persisted_hits', 'stale_hits', 'batches', 'encoded'}
+
+@app.route('/metrics')
+def metrics():
+    """Request and per-stage latency histograms plus encoder and cache counters, in Prometheus text format."""
+    gauges, counters = {}, {}
+    for prefix, stats in [('pathfinder_encoder', encoder.stats()), ('pathfinder_query_cache', query_cache.stats()),
+                          ('pathfinder_live_roadmap_cache', live_roadmap_cache.stats())]:
+        for name, value in stats.items():
+            if isinstance(value, (int, float)): (counters if name in COUNTER_STATS else gauges)[f"{prefix}_{name}"] = value
+    gauges['pathfinder_ai_ready'] = int(_ai_ready.is_set())
+    return tracing.render_metrics(gauges, counters), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/save_job', methods=['POST'])
 @login_required
@@ -184,14 +392,13 @@ def save_job():
     data = request.get_json()
     job_data = {key: data.get(key) for key in ['title', 'company', 'location', 'description', 'link', 'source']}
     if not all([job_data['title'], job_data['link']]): return {"status": "error", "message": "Missing data"}, 400
-    conn = sqlite3.connect('database.db')
-    try:
-        conn.execute('INSERT INTO user_saved_jobs (user_id, job_title, job_company, job_location, job_description, job_link, job_source) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                     (current_user.id, job_data['title'], job_data['company'], job_data['location'], job_data['description'], job_data['link'], job_data['source']))
-        conn.commit(); status, message = "success", "Job Saved!"
-    except sqlite3.IntegrityError: status, message = "info", "Already Saved"
-    finally: conn.close()
+    if save_job_for_user(current_user.id, job_data): status, message = "success", "Job Saved!"
+    else: status, message = "info", "Already Saved"
     return {"status": status, "message": message}
 
+if AI_LOAD_MODE == 'eager': ensure_ai_loaded()
+elif AI_LOAD_MODE == 'background': threading.Thread(target=_warm_up, name='ai-warm-up', daemon=True).start()
+startup_timings['import app'] = time.perf_counter() - _import_started
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,128 @@
+# asgi.py
+"""
+ASGI serving mode. /get_roadmap and /api/recommendations are handled natively on
+the event loop: model inference runs on a dedicated executor and a pending live
+scrape is awaited without holding a worker thread, so one process can keep many
+roadmap requests in flight. Every other route (pages, login, forms) is passed
+through to the Flask app unchanged.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+
+import app as webapp
+import tracing
+
+# Encodes from these threads are coalesced by app.encoder, so more workers mean bigger batches, not more torch calls.
+INFERENCE_WORKERS = int(os.environ.get('PATHFINDER_INFERENCE_WORKERS', 8))
+# How long /get_roadmap waits for a first-time scrape before answering with live_pending.
+LIVE_ROADMAP_WAIT = float(os.environ.get('PATHFINDER_LIVE_ROADMAP_WAIT', 20))
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+flask_application = WsgiToAsgi(webapp.app)
+
+async def run_inference(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, func, *args)
+
+# --- REQUEST HELPERS ---
+async def read_body(receive):
+    body, more_body = b'', True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+def session_user_id(scope):
+    """The Flask-Login user id from the signed session cookie, or None."""
+    cookies = SimpleCookie()
+    for name, value in scope['headers']:
+        if name == b'cookie': cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(webapp.app.config['SESSION_COOKIE_NAME'])
+    if morsel is None: return None
+    serializer = webapp.app.session_interface.get_signing_serializer(webapp.app)
+    try:
+        session = serializer.loads(morsel.value, max_age=int(webapp.app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return session.get('_user_id')
+
+# --- NATIVE ROUTES ---
+async def wait_for_live_roadmap(job_title):
+    live_resources = webapp.get_live_roadmap(job_title)
+    if live_resources is not None: return live_resources
+    future = webapp.live_roadmap_cache.pending(job_title)
+    if future is None: return webapp.get_live_roadmap(job_title)
+    try:
+        # shield: a timed-out request must not cancel the scrape other requests are sharing.
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), LIVE_ROADMAP_WAIT)
+    except asyncio.TimeoutError:
+        return None
+
+def _static_roadmap(job_title):
+    webapp.reload_catalogs_if_changed()
+    return webapp.get_static_roadmap(job_title, job_title)
+
+async def get_roadmap(scope, receive, send):
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+    except ValueError:
+        return await send_json(send, {"error": "Invalid JSON"}, 400)
+    job_title = data.get('title') if isinstance(data, dict) else None
+    if not job_title: return await send_json(send, {"error": "Job title is required"}, 400)
+    live_resources, static_resources = await asyncio.gather(wait_for_live_roadmap(job_title), run_inference(_static_roadmap, job_title))
+    final_roadmap = webapp.merge_roadmap(live_resources, static_resources)
+    await send_json(send, {"roadmap": final_roadmap, "live_pending": live_resources is None})
+
+def _dashboard(user_id):
+    webapp.reload_catalogs_if_changed()
+    user = webapp.load_user(user_id)
+    if user is None: return None
+    return webapp.get_dashboard(user)
+
+async def get_recommendations(scope, receive, send):
+    user_id = session_user_id(scope)
+    dashboard = await run_inference(_dashboard, user_id) if user_id else None
+    if dashboard is None: return await send_json(send, {"error": "Login required"}, 401)
+    recommended_jobs, static_resources = dashboard
+    await send_json(send, {"jobs": recommended_jobs, "static_roadmap": static_resources})
+
+ROUTES = {
+    ('POST', '/get_roadmap'): get_roadmap,
+    ('GET', '/api/recommendations'): get_recommendations,
+}
+
+# --- APPLICATION ---
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            inference_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'}); return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan': return await lifespan(receive, send)
+    handler = ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if handler is not None:
+        started = time.perf_counter()
+        try:
+            return await handler(scope, receive, send)
+        finally:
+            tracing.observe_request(scope['path'], time.perf_counter() - started)
+    await flask_application(scope, receive, send)
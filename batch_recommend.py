@@ -0,0 +1,93 @@
+# batch_recommend.py
+# Precomputes job recommendations for every user in the database, e.g. for nightly
+# emails or to refresh materialized dashboards after a catalog update.
+#
+#     python batch_recommend.py --chunk-size 1024 --top-k 10
+import argparse
+import json
+import time
+import numpy as np
+import recommender
+import db
+import skill_index
+
+DATABASE_FILE = db.DATABASE_FILE  # PATHFINDER_DB, shared with the app
+CHUNK_SIZE = 1024
+ENCODE_BATCH_SIZE = 256
+TOP_K = 10
+
+def iter_user_chunks(conn, chunk_size):
+    """
+    Streams (user_id, profile_query, skills) chunks for users with a filled-in profile.
+    Keyset pagination on id means no read cursor stays open while results are written.
+    """
+    last_id = -1
+    while True:
+        rows = conn.execute("SELECT id, degree, skills, college FROM users WHERE skills IS NOT NULL AND skills != '' AND id > ? ORDER BY id LIMIT ?",
+                            (last_id, chunk_size)).fetchall()
+        if not rows: return
+        last_id = rows[-1][0]
+        yield [(row[0], recommender.build_profile_query(row[1], row[2], row[3]), row[2]) for row in rows]
+
+def score_chunk(model, catalog, course_catalog, chunk, top_k):
+    """
+    One batched encode and one matrix-matrix hybrid search for a whole chunk of users,
+    then one more batched encode for the static roadmaps of their top jobs.
+    """
+    queries, keywords = [query for _, query, _ in chunk], [skills for _, _, skills in chunk]
+    embeddings = model.encode(queries, batch_size=ENCODE_BATCH_SIZE)
+    matches = recommender.hybrid_search(catalog, keywords, np.asarray(embeddings), min(top_k, len(catalog)))
+    results = [recommender.job_results(catalog, scores, ids, skill_index.MATCHER.mask(query))
+               for (scores, ids), query in zip(matches, queries)]
+    roadmaps = [[] for _ in results]
+    with_jobs = [row for row, jobs in enumerate(results) if jobs]
+    if course_catalog is not None and with_jobs:
+        profile_embeddings = model.encode([recommender.top_job_profile(results[row][0]) for row in with_jobs], batch_size=ENCODE_BATCH_SIZE)
+        for row, embedding in zip(with_jobs, profile_embeddings):
+            roadmaps[row] = recommender.static_roadmap(course_catalog, results[row][0]['title'], embedding)
+    return results, roadmaps
+
+def write_chunk(conn, chunk, results, roadmaps, catalog_version):
+    now = time.time()
+    conn.executemany('INSERT OR REPLACE INTO user_recommendations (user_id, profile_version, catalog_version, recommendations, static_roadmap, computed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                     [(user_id, recommender.profile_version(query), catalog_version, json.dumps(jobs), json.dumps(roadmap), now)
+                      for (user_id, query, _), jobs, roadmap in zip(chunk, results, roadmaps)])
+    conn.commit()
+
+def recommend_for_all_users(model=None, catalog=None, course_catalog=None, database=DATABASE_FILE, chunk_size=CHUNK_SIZE, top_k=TOP_K):
+    """
+    Scores every user and stores the results in user_recommendations, where the
+    dashboard picks them up; returns (users, seconds).
+    """
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(recommender.MODEL_NAME)
+    if catalog is None: catalog = recommender.load_job_catalog()
+    if catalog is None: return 0, 0.0
+    if course_catalog is None: course_catalog = recommender.load_course_catalog()
+    catalog_version = recommender.catalog_version(catalog, course_catalog)
+
+    conn = db.connect(database)
+    total, start = 0, time.perf_counter()
+    try:
+        for chunk in iter_user_chunks(conn, chunk_size):
+            results, roadmaps = score_chunk(model, catalog, course_catalog, chunk, top_k)
+            write_chunk(conn, chunk, results, roadmaps, catalog_version)
+            total += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"  {total} users scored ({total / elapsed:.1f} users/s)")
+    finally:
+        conn.close()
+    return total, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute job recommendations for every user.")
+    parser.add_argument('--db', default=DATABASE_FILE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+    total, elapsed = recommend_for_all_users(database=args.db, chunk_size=args.chunk_size, top_k=args.top_k)
+    print(f"Done: {total} users in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} users/s)")
+
+if __name__ == "__main__":
+    main()
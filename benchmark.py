@@ -0,0 +1,268 @@
+# benchmark.py
+# Latency / throughput / memory benchmark of the recommendation hot path, run
+# offline on CPU: a synthetic catalog of the requested size is built with
+# generate_embeddings.py's own pipeline (a hashing encoder stands in for the
+# sentence-transformer), live scrapers are stubbed, and routes go through the
+# Flask test client.
+#
+#     python benchmark.py --jobs 100000 --save-baseline
+#     python benchmark.py --jobs 100000            # compares against the saved baseline
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+import numpy as np
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- BENCHMARK SETTINGS ---
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmark_baseline.json')
+WORK_DIR = os.path.join(tempfile.gettempdir(), 'pathfinder-benchmark')
+# A benchmark regresses when its p95 latency grows by more than this fraction over the baseline; so does the
+# run as a whole when its peak RSS does (ru_maxrss is a process-wide high-water mark, not a per-benchmark figure).
+REGRESSION_TOLERANCE = 0.2
+HASH_DIM = 384  # same width as all-MiniLM-L6-v2
+
+ROLES = ['Software Engineer', 'Data Analyst', 'Data Scientist', 'Frontend Developer', 'Backend Developer', 'Full Stack Developer',
+         'DevOps Engineer', 'Machine Learning Engineer', 'UX Designer', 'QA Engineer', 'Cloud Engineer', 'Product Analyst']
+LEVELS = ['Junior', 'Senior', 'Lead', 'Intern', 'Associate', 'Staff', '']
+LOCATIONS = ['Remote', 'New York, NY', 'Denver, CO', 'San Francisco, CA', 'Austin, TX', 'Bengaluru, Karnataka, India',
+             'Pune, Maharashtra, India', 'London, England, United Kingdom', 'Berlin, Germany', 'Toronto, ON']
+SOURCES = ['LinkedIn', 'Indeed']
+COURSE_LEVELS = ['Beginners', 'Intermediate', 'Professionals', 'Data Teams', 'Web Developers']
+STUB_RESOURCES = [{'title': 'Stubbed live resource', 'source': 'YouTube', 'type': 'YouTube Video', 'link': 'https://example.com/live', 'skills_taught': ''}]
+
+class HashEncoder:
+    """
+    Deterministic bag-of-words encoder: each token maps to a fixed random
+    vector seeded by its hash and a text is the sum of its tokens' vectors.
+    Texts sharing words land close together, so search results stay meaningful.
+    Usable both as the generate_embeddings.py encoder and as the app's model.
+    """
+    def __init__(self, dim=HASH_DIM):
+        from skill_index import tokenize
+        self._tokenize, self.dim = tokenize, dim
+        self._token_ids, self._table = {}, np.empty((0, dim), dtype=np.float32)
+
+    def _token_id(self, token):
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self._token_ids)
+            if token_id == len(self._table):
+                self._table = np.concatenate([self._table, np.empty((max(1024, len(self._table)), self.dim), dtype=np.float32)])
+            self._table[token_id] = np.random.default_rng(zlib.crc32(token.encode('utf-8'))).standard_normal(self.dim)
+        return token_id
+
+    def encode(self, texts, batch_size=None):
+        if isinstance(texts, str): return self.encode([texts])[0]
+        ids = [[self._token_id(t) for t in self._tokenize(text)] or [self._token_id('')] for text in texts]
+        starts = np.concatenate([[0], np.cumsum([len(row) for row in ids[:-1]])]).astype(np.int64)
+        return np.add.reduceat(self._table[np.concatenate(ids)], starts, axis=0) if ids else np.empty((0, self.dim), dtype=np.float32)
+
+    def dimension(self):
+        return self.dim
+
+    def close(self):
+        pass
+
+# --- SYNTHETIC CATALOGS ---
+def write_synthetic_jobs(path, count, seed):
+    rng = np.random.default_rng(seed)
+    from skill_index import SKILL_LIST
+    companies = [f"Company {i}" for i in range(max(10, count // 20))]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'company', 'location', 'description', 'link', 'source', 'skills'])
+        for i in range(count):
+            title = f"{LEVELS[rng.integers(len(LEVELS))]} {ROLES[rng.integers(len(ROLES))]}".strip()
+            company, location = companies[rng.integers(len(companies))], LOCATIONS[rng.integers(len(LOCATIONS))]
+            skills = [SKILL_LIST[j] for j in rng.choice(len(SKILL_LIST), 4, replace=False)]
+            description = f"{title} at {company} in {location}. Work with {', '.join(skills[:3])} and {skills[3]}."
+            writer.writerow([title, company, location, description, f"https://jobs.example.com/{i}", SOURCES[rng.integers(len(SOURCES))], ';'.join(skills)])
+
+def write_synthetic_courses(path, count, seed):
+    rng = np.random.default_rng(seed + 1)
+    from skill_index import SKILL_LIST
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'source', 'type', 'link', 'skills_taught'])
+        for i in range(count):
+            skills = [SKILL_LIST[j] for j in rng.choice(len(SKILL_LIST), 3, replace=False)]
+            writer.writerow([f"{skills[0].title()} for {COURSE_LEVELS[rng.integers(len(COURSE_LEVELS))]}", 'Coursera', 'Course',
+                             f"https://courses.example.com/{i}", ';'.join(skills)])
+
+def catalog_dir(args, kind):
+    count = args.jobs if kind == 'Jobs' else args.courses
+    return os.path.join(args.work_dir, f"{kind.lower()}-{count}-{args.dtype}-seed{args.seed}")
+
+def configure_environment(args):
+    """Points the app at the synthetic catalogs and a scratch database; must run before app or recommender is imported."""
+    os.environ['PATHFINDER_JOBS_CATALOG'], os.environ['PATHFINDER_COURSES_CATALOG'] = catalog_dir(args, 'Jobs'), catalog_dir(args, 'Courses')
+    os.environ['PATHFINDER_DB'] = os.path.join(args.work_dir, 'benchmark.db')
+    os.environ['PATHFINDER_AI_LOAD'] = 'lazy'
+
+def build_catalogs(args, encoder):
+    """Builds the synthetic job and course catalogs, or reuses ones left by an earlier run with the same settings."""
+    import catalog_store
+    import generate_embeddings
+    for kind, count, write in [('Jobs', args.jobs, write_synthetic_jobs), ('Courses', args.courses, write_synthetic_courses)]:
+        output_dir = catalog_dir(args, kind)
+        if catalog_store.current_version(output_dir) is not None and not args.rebuild:
+            print(f"Reusing synthetic {kind.lower()} catalog at {output_dir}"); continue
+        write(output_dir + '.csv', count, args.seed)
+        generate_embeddings.generate_embeddings(encoder, output_dir + '.csv', output_dir, kind, args.dtype, full_precision=args.dtype != 'float32')
+
+# --- MEASUREMENT ---
+def peak_rss_mb():
+    """Peak resident set size of this process in MB; None where it can't be read (Windows without psutil)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+    try:
+        import psutil
+    except ImportError:
+        return None
+    peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)  # Windows' peak working set
+    return peak / 1024 / 1024 if peak is not None else None
+
+def run_benchmark(name, func, iterations, warmup):
+    """Calls func(i) `warmup` times untimed, then `iterations` times; returns latency percentiles and throughput."""
+    for i in range(warmup): func(i)
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        func(warmup + i)
+        latencies[i] = time.perf_counter() - call_started
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    result = {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'mean_ms': latencies.mean() * 1000,
+              'throughput_per_s': iterations / elapsed}
+    print(f"  {name:<24} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms  {result['throughput_per_s']:9.1f}/s")
+    return result
+
+def profile_query(i):
+    from skill_index import SKILL_LIST
+    skills = ', '.join(SKILL_LIST[(i * 7 + j * 13) % len(SKILL_LIST)] for j in range(3))
+    return f"aspiring computer science developer with skills in {skills} from college {i}"
+
+def run_suite(args, encoder):
+    if os.path.exists(os.environ['PATHFINDER_DB']): os.remove(os.environ['PATHFINDER_DB'])
+    import sqlite3
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')) as f: schema = f.read()
+    connection = sqlite3.connect(os.environ['PATHFINDER_DB']); connection.executescript(schema); connection.close()
+
+    import app as webapp
+    import models
+    import recommender
+    import skill_index
+    started = time.perf_counter()
+    webapp.load_ai_data = lambda: (encoder, recommender.load_job_catalog(), recommender.load_course_catalog())
+    webapp.ensure_ai_loaded()
+    webapp.live_roadmap_cache.fetch = lambda query: STUB_RESOURCES
+    results = {'setup': {'load_catalogs_s': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb()}}
+    print(f"Catalogs loaded in {results['setup']['load_catalogs_s']:.2f}s ({len(webapp.job_catalog)} jobs, {len(webapp.course_catalog)} courses)")
+
+    client = webapp.app.test_client()
+    client.post('/register', data={'username': 'bench', 'password': 'bench'})
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+    client.post('/edit_profile', data={'full_name': 'Bench', 'age': '22', 'city': 'Denver', 'college': 'State', 'degree': 'Computer Science',
+                                       'skills': 'python, sql, docker'})
+    job_bits, rng = webapp.job_catalog.arrays['skill_bits'], np.random.default_rng(args.seed)
+    user_id = models.get_user_by_username('bench').id
+
+    def skills_gap(i):
+        user_bits, bits = skill_index.MATCHER.mask(profile_query(i)), np.asarray(job_bits[rng.integers(len(job_bits), size=10)])
+        skill_index.decode_rows(bits); skill_index.decode_rows(skill_index.skills_gap(bits, user_bits))
+
+    def check(response):
+        if response.status_code != 200: raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+
+    benchmarks = [
+        ('recommend_jobs', lambda i: webapp.recommend_jobs(profile_query(i))),
+        ('get_static_roadmap', lambda i: webapp.get_static_roadmap(ROLES[i % len(ROLES)], f"{ROLES[i % len(ROLES)]} {i}")),
+        ('skills_gap', skills_gap),
+        # After the first call GET / is served from the materialized user_recommendations row;
+        # the cold case drops that row first, so every call recomputes the dashboard.
+        ('GET /', lambda i: check(client.get('/'))),
+        ('GET / (cold dashboard)', lambda i: (models.delete_materialized_recommendations(user_id), check(client.get('/')))),
+        ('POST /get_roadmap', lambda i: check(client.post('/get_roadmap', json={'title': f"{ROLES[i % len(ROLES)]} {i % 50}"}))),
+        ('POST /save_job', lambda i: check(client.post('/save_job', json={'title': 'Benchmark job', 'company': 'Company', 'location': 'Remote',
+                                                                           'description': '', 'link': f"https://jobs.example.com/saved/{i}", 'source': 'LinkedIn'}))),
+    ]
+    print(f"\n{args.iterations} iterations each after {args.warmup} warm-up calls:")
+    for name, func in benchmarks:
+        if args.only and name not in args.only: continue
+        results[name] = run_benchmark(name, func, args.iterations, args.warmup)
+    results['run'] = {'peak_rss_mb': peak_rss_mb()}
+    peak = results['run']['peak_rss_mb']
+    print(f"Peak RSS over the whole run: {'unavailable' if peak is None else f'{peak:.0f} MB'}")
+    return results
+
+# --- BASELINE ---
+def compare(results, baseline, tolerance):
+    """Prints each benchmark's p95 change, then the run's peak RSS change, against the baseline; returns what regressed."""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['created']} (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if name in ('setup', 'run') or base is None: continue
+        change = result['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        if change > tolerance: regressions.append(name)
+        print(f"  {name:<24} p95 {base['p95_ms']:8.2f} -> {result['p95_ms']:8.2f} ms ({change:+.0%}){'  REGRESSION' if change > tolerance else ''}")
+    base_peak, peak = baseline['results'].get('run', {}).get('peak_rss_mb'), results['run']['peak_rss_mb']
+    if base_peak and peak is not None:
+        change = peak / base_peak - 1
+        if change > tolerance: regressions.append('peak RSS')
+        print(f"  {'peak RSS (whole run)':<24}     {base_peak:8.0f} -> {peak:8.0f} MB ({change:+.0%}){'  REGRESSION' if change > tolerance else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation hot path on a synthetic catalog.")
+    parser.add_argument('--jobs', type=int, default=10000, help="Synthetic job catalog size (e.g. 1000 to 1000000).")
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--dtype', choices=['float32', 'float16', 'int8'], default='float32')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="Run only these benchmarks, e.g. recommend_jobs 'GET /'.")
+    parser.add_argument('--work-dir', default=WORK_DIR, help="Where synthetic catalogs are built and kept for reuse.")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the synthetic catalogs even if they exist.")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--json', help="Also write the results to this file.")
+    args = parser.parse_args()
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    configure_environment(args)
+    encoder = HashEncoder()
+    build_catalogs(args, encoder)
+    results = run_suite(args, encoder)
+    # The benchmarks selected with --only change the run's peak RSS, so they are part of what must match.
+    config = {key: getattr(args, key) for key in ['jobs', 'courses', 'dtype', 'iterations', 'warmup', 'seed', 'only']}
+    report = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'config': config, 'results': results}
+    if args.json:
+        with open(args.json, 'w') as f: json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f: json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+        if baseline['config'] != config:
+            print(f"\nBaseline {args.baseline} was recorded with {baseline['config']}; not comparing.")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}"); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# bm25_index.py
+import numpy as np
+from skill_index import tokenize
+from vector_index import in_sorted
+
+# --- BM25 DEFAULTS ---
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Constant in reciprocal-rank fusion; larger values flatten the advantage of top ranks.
+RRF_K = 60
+# Arrays save_bm25 writes, one .npy file each.
+BM25_ARRAYS = ('token_offsets', 'token_data', 'offsets', 'ids', 'tfs', 'doc_lengths', 'params')
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index. Each token's postings are a slice of the
+    flat `ids` / `tfs` arrays, so a query only touches rows containing one of
+    its tokens.
+    """
+    def __init__(self, tokens, offsets, ids, tfs, doc_lengths, k1=BM25_K1, b=BM25_B):
+        self.tokens = list(tokens)
+        self.offsets, self.ids, self.tfs, self.doc_lengths = offsets, ids, tfs, doc_lengths
+        self.k1, self.b = k1, b
+        self._token_ids = {token: i for i, token in enumerate(self.tokens)}
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B):
+        builder = BM25Builder()
+        builder.add(texts)
+        return builder.finish(k1=k1, b=b)
+
+    def search(self, query, k, allowed=None):
+        """
+        Returns (scores, ids) of the best `k` rows for `query`, best first; empty
+        if no token matches. `allowed` (ascending row ids) restricts the rows returned.
+        """
+        ids, contributions = [], []
+        for token in set(tokenize(query)):
+            t = self._token_ids.get(token)
+            if t is None: continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            rows, tfs = self.ids[start:end], self.tfs[start:end]
+            idf = np.log(1 + (len(self) - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / self.avg_doc_length)
+            ids.append(rows); contributions.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not ids: return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        candidates, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+        if allowed is not None:
+            keep = in_sorted(candidates, allowed)
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) == 0: return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return scores[top], candidates[top]
+
+    def to_arrays(self):
+        encoded = [t.encode('utf-8') for t in self.tokens]
+        token_offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded], dtype=np.int64)]).astype(np.int64)
+        return {'token_offsets': token_offsets, 'token_data': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                'offsets': self.offsets, 'ids': self.ids, 'tfs': self.tfs, 'doc_lengths': self.doc_lengths,
+                'params': np.array([self.k1, self.b], dtype=np.float64)}
+
+class BM25Builder:
+    """Accumulates postings one batch of documents at a time, kept as compact arrays rather than per-row lists."""
+    def __init__(self):
+        self.count = 0
+        self._vocabulary = {}  # token -> token id, in first-seen order
+        self._token_ids, self._row_ids, self._tfs, self._doc_lengths = [], [], [], []
+
+    def add(self, texts):
+        token_ids, row_ids, tfs, doc_lengths = [], [], [], []
+        for text in texts:
+            counts = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                token_ids.append(self._vocabulary.setdefault(token, len(self._vocabulary)))
+                row_ids.append(self.count); tfs.append(count)
+            doc_lengths.append(sum(counts.values()))
+            self.count += 1
+        self._token_ids.append(np.array(token_ids, dtype=np.int32))
+        self._row_ids.append(np.array(row_ids, dtype=np.int64))
+        self._tfs.append(np.array(tfs, dtype=np.float32))
+        self._doc_lengths.append(np.array(doc_lengths, dtype=np.float32))
+
+    def finish(self, k1=BM25_K1, b=BM25_B):
+        token_ids = np.concatenate(self._token_ids) if self._token_ids else np.empty(0, dtype=np.int32)
+        order = np.argsort(token_ids, kind='stable')  # groups postings by token, rows stay ascending
+        counts = np.bincount(token_ids, minlength=len(self._vocabulary))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        concat = lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        return BM25Index(list(self._vocabulary), offsets, concat(self._row_ids, np.int64)[order], concat(self._tfs, np.float32)[order],
+                         concat(self._doc_lengths, np.float32), k1=k1, b=b)
+
+def save_bm25(index, prefix):
+    """One plain `<prefix>.<array>.npy` per array, so load_bm25 can memory-map them."""
+    for name, array in index.to_arrays().items():
+        np.save(f'{prefix}.{name}.npy', array)
+
+def load_bm25(prefix, num_rows):
+    """
+    Opens an index saved by save_bm25 with its postings memory-mapped, shared
+    through the page cache like the other catalog arrays; None if it is missing
+    or was built for a different row count.
+    """
+    try:
+        data = {name: np.load(f'{prefix}.{name}.npy', mmap_mode='r') for name in BM25_ARRAYS}
+    except FileNotFoundError:
+        return None
+    if len(data['doc_lengths']) != num_rows: return None
+    token_offsets, token_data = data['token_offsets'], data['token_data'].tobytes()
+    tokens = [token_data[token_offsets[i]:token_offsets[i + 1]].decode('utf-8') for i in range(len(token_offsets) - 1)]
+    k1, b = data['params'].tolist()
+    return BM25Index(tokens, data['offsets'], data['ids'], data['tfs'], data['doc_lengths'], k1=k1, b=b)
+
+# --- FUSION ---
+def reciprocal_rank_fusion(rankings, limit, k=RRF_K):
+    """Fuses ranked id lists (best first, -1 = padding) into the top `limit` ids by sum of 1 / (k + rank)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking.tolist()):
+            if idx >= 0: fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank + 1)
+    ordered = sorted(fused, key=lambda idx: -fused[idx])[:limit]
+    return np.array(ordered, dtype=np.int64)
@@ -0,0 +1,431 @@
+# catalog_store.py
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+import vector_index
+
+# On-disk catalog layout. A catalog directory holds one subdirectory per version
+# plus two small pointer files, each replaced atomically with os.replace:
+#   CURRENT                 name of the version subdirectory readers open
+#   BUILDING                name of the version a CatalogWriter is still writing (removed on close)
+# so publishing a version never renames or deletes files a reader may have mapped.
+# Superseded versions are deleted by a later load_catalog (see collect_old_versions).
+# Each version subdirectory contains:
+#   manifest.json           format version, row count, embedding dim/dtype, column names
+#   embeddings.bin          raw (count, dim) matrix of L2-normalized vectors, np.memmap-able
+#   embedding_scales.bin    int8 catalogs only: one float32 scale per row
+#   embeddings_full.bin     optional float32 copy of quantized vectors, read only to rerank top candidates
+#   col_<name>.offsets/.data  one utf-8 string column: int64 offsets + concatenated bytes
+#   <name>.npy              extra per-row arrays (e.g. skill bitsets), loaded with mmap_mode='r'
+#   <name>.postings.*       token -> row-id posting lists (e.g. job search filters, see job_filters.py)
+#   index.npz               vector index structure (see vector_index.save_index)
+#   bm25.<array>.npy        BM25 inverted index over the searchable text columns (see bm25_index.save_bm25)
+# Every file is read through the OS page cache, so gunicorn workers share one copy.
+FORMAT_VERSION = 1
+EMBEDDING_DTYPES = ('float32', 'float16', 'int8')
+MANIFEST_FILE = 'manifest.json'
+EMBEDDINGS_FILE = 'embeddings.bin'
+SCALES_FILE = 'embedding_scales.bin'
+FULL_EMBEDDINGS_FILE = 'embeddings_full.bin'
+INDEX_FILE = 'index.npz'
+BM25_PREFIX = 'bm25'
+CURRENT_FILE = 'CURRENT'
+BUILDING_FILE = 'BUILDING'
+# Versions kept besides the current one, for readers that have not reloaded yet.
+KEEP_OLD_VERSIONS = 1
+
+def _memmap(path, dtype, shape=None):
+    if os.path.getsize(path) == 0:
+        return np.empty(shape if shape is not None else 0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+class StringColumn:
+    """Read-only string column backed by memory-mapped offsets and utf-8 bytes."""
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        # Plain views: every slice of an np.memmap pays for its subclass bookkeeping.
+        self._offsets, self._view = np.asarray(offsets), memoryview(np.asarray(data))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._view[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def take(self, ids):
+        """Values at `ids`: offsets are gathered with one fancy index, then each value is decoded straight from the mapped bytes."""
+        ids = np.asarray(ids, dtype=np.int64)
+        view = self._view
+        return [str(view[start:end], 'utf-8') for start, end in zip(self._offsets[ids].tolist(), self._offsets[ids + 1].tolist())]
+
+    @classmethod
+    def from_list(cls, values):
+        encoded = [str(v).encode('utf-8') for v in values]
+        offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded], dtype=np.int64)]).astype(np.int64)
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+class Catalog:
+    """
+    A job or course catalog: string columns, an embedding matrix and precomputed
+    extras. `full_embeddings` is the float32 copy of quantized embeddings, if kept.
+    """
+    def __init__(self, columns, embeddings, arrays=None, postings=None, metadata=None, index_path=None, path=None, version=None,
+                 full_embeddings=None):
+        self.columns = columns
+        self.embeddings = embeddings
+        self.full_embeddings = full_embeddings
+        self.arrays = arrays or {}
+        self.postings = postings or {}
+        self.metadata = metadata or {}
+        self.index_path = index_path
+        self.path = path
+        self.version = version
+        # Set by the app once the vector and BM25 indexes (and, for jobs, the search filters) for these rows are loaded.
+        self.index = None
+        self.bm25 = None
+        self.filters = None
+        self.link_lookup = None
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def row(self, i):
+        return {name: column[i] for name, column in self.columns.items()}
+
+    def take(self, ids, names=None):
+        """Column name -> list of values at `ids`, each column gathered in one pass."""
+        return {name: self.columns[name].take(ids) for name in (names or self.columns)}
+
+    def rows(self, ids):
+        columns = self.take(ids)
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def values(self, name):
+        column = self.columns[name]
+        return column.take(range(len(column)))
+
+# --- WRITING ---
+CHECKPOINT_FILE = 'checkpoint.json'
+
+class CatalogWriter:
+    """
+    Writes a new version of the catalog at `path` into its own subdirectory and
+    publishes it on close() by replacing the CURRENT pointer, so readers never
+    see a half-written version. Rows can be appended in batches.
+    With a quantized dtype, `full_precision=True` also keeps a float32 copy for reranking.
+
+    checkpoint() makes the rows appended so far durable. A writer created with a
+    `resume_key` equal to the last checkpoint's picks up from there (see
+    `resumed_state`) instead of starting over.
+    """
+    def __init__(self, path, column_names, dim, dtype='float32', metadata=None, full_precision=False, resume_key=None):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype '{dtype}', expected one of {EMBEDDING_DTYPES}")
+        self.path = path
+        self.column_names, self.dim, self.dtype = list(column_names), dim, dtype
+        self.full_precision = full_precision and dtype != 'float32'
+        self.metadata = dict(metadata or {})
+        self.resume_key = resume_key
+        self.count, self.extra_arrays, self.extra_postings = 0, [], []
+        self._files, self._streams, self._column_ends = {}, {}, {name: 0 for name in self.column_names}
+        checkpoint = None
+        if resume_key is not None and _read_pointer(path, BUILDING_FILE):
+            self._use_version(_read_pointer(path, BUILDING_FILE))
+            checkpoint = self._read_checkpoint()
+        self.resumed_state = checkpoint['state'] if checkpoint else None
+        if checkpoint:
+            self.count, self._column_ends = checkpoint['count'], checkpoint['column_ends']
+            self._streams = {name: (dtype, tuple(shape)) for name, (dtype, shape) in checkpoint['streams'].items()}
+            for name, size in checkpoint['sizes'].items():
+                # Drop anything written after the checkpoint, e.g. half a batch from a crashed run.
+                os.truncate(os.path.join(self.version_path, name), size)
+                self._files[name] = open(os.path.join(self.version_path, name), 'ab')
+            return
+        abandoned = _read_pointer(path, BUILDING_FILE)
+        if abandoned and abandoned != _read_pointer(path, CURRENT_FILE):
+            shutil.rmtree(os.path.join(path, abandoned), ignore_errors=True)
+        self._use_version(f"{int(time.time() * 1000):x}")
+        os.makedirs(self.version_path)
+        _write_pointer(path, BUILDING_FILE, self.version)
+        self._open(EMBEDDINGS_FILE)
+        if dtype == 'int8': self._open(SCALES_FILE)
+        if self.full_precision: self._open(FULL_EMBEDDINGS_FILE)
+        for name in self.column_names:
+            self._open(f'col_{name}.offsets').write(np.zeros(1, dtype=np.int64).tobytes())
+            self._open(f'col_{name}.data')
+
+    def _use_version(self, version):
+        self.version, self.version_path = version, os.path.join(self.path, version)
+
+    def _open(self, name):
+        self._files[name] = open(os.path.join(self.version_path, name), 'wb')
+        return self._files[name]
+
+    def _signature(self):
+        return {'dim': self.dim, 'dtype': self.dtype, 'full_precision': self.full_precision, 'columns': self.column_names}
+
+    def _read_checkpoint(self):
+        try:
+            with open(os.path.join(self.version_path, CHECKPOINT_FILE)) as f: checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if checkpoint.get('signature') != self._signature() or checkpoint.get('resume_key') != self.resume_key: return None
+        return checkpoint
+
+    def append(self, records, embeddings):
+        """`records` maps column name -> list of values; `embeddings` is a (n, dim) array."""
+        embeddings = vector_index.normalize(np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim))
+        stored = vector_index.quantize(embeddings, self.dtype)
+        if self.dtype == 'int8':
+            self._files[EMBEDDINGS_FILE].write(stored.codes.tobytes()); self._files[SCALES_FILE].write(stored.scales.tobytes())
+        else:
+            self._files[EMBEDDINGS_FILE].write(stored.tobytes())
+        if self.full_precision: self._files[FULL_EMBEDDINGS_FILE].write(embeddings.tobytes())
+        for name in self.column_names:
+            encoded = [('' if _is_missing(v) else str(v)).encode('utf-8') for v in records[name]]
+            if len(encoded) != len(embeddings):
+                raise ValueError(f"Column '{name}' has {len(encoded)} values for {len(embeddings)} embeddings")
+            self._files[f'col_{name}.data'].write(b''.join(encoded))
+            ends = self._column_ends[name] + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+            self._files[f'col_{name}.offsets'].write(ends.astype(np.int64).tobytes())
+            if len(ends): self._column_ends[name] = int(ends[-1])
+        self.count += len(embeddings)
+
+    def append_array(self, name, rows):
+        """Streams rows of a per-row array (e.g. skill bitsets) alongside append(); stored as `<name>.npy` on close()."""
+        rows = np.ascontiguousarray(rows)
+        if name not in self._streams:
+            self._streams[name] = (rows.dtype.str, rows.shape[1:])
+            self._open(f'{name}.rows')
+        self._files[f'{name}.rows'].write(rows.tobytes())
+
+    def add_array(self, name, array):
+        np.save(os.path.join(self.version_path, f'{name}.npy'), np.asarray(array))
+        self.extra_arrays.append(name)
+
+    def add_postings(self, name, postings):
+        write_postings(os.path.join(self.version_path, name), postings)
+        self.extra_postings.append(name)
+
+    def add_file(self, name):
+        """Path inside the new catalog for a caller-written file, e.g. the vector index."""
+        return os.path.join(self.version_path, name)
+
+    def checkpoint(self, state=None):
+        """Flushes and fsyncs everything appended so far and records it, with `state`, for a later resume."""
+        for f in self._files.values():
+            f.flush(); os.fsync(f.fileno())
+        checkpoint = {'signature': self._signature(), 'resume_key': self.resume_key, 'count': self.count, 'state': state,
+                      'column_ends': self._column_ends, 'streams': self._streams,
+                      'sizes': {name: f.tell() for name, f in self._files.items()}}
+        checkpoint_path = os.path.join(self.version_path, CHECKPOINT_FILE)
+        with open(checkpoint_path + '.tmp', 'w') as f: json.dump(checkpoint, f)
+        os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+    def vectors(self):
+        """
+        Memory-mapped view of the embeddings appended so far (the float32 copy if
+        kept), e.g. to build the vector index before close() without loading them.
+        """
+        for f in self._files.values(): f.flush()
+        shape = (self.count, self.dim)
+        if self.full_precision:
+            return _memmap(os.path.join(self.version_path, FULL_EMBEDDINGS_FILE), np.float32, shape)
+        embeddings = _memmap(os.path.join(self.version_path, EMBEDDINGS_FILE), self.dtype, shape)
+        if self.dtype == 'int8':
+            return vector_index.Int8Vectors(embeddings, _memmap(os.path.join(self.version_path, SCALES_FILE), np.float32, shape[:1]))
+        return embeddings
+
+    def column(self, name):
+        """Memory-mapped view of a string column appended so far."""
+        for f in self._files.values(): f.flush()
+        return StringColumn(_memmap(os.path.join(self.version_path, f'col_{name}.offsets'), np.int64),
+                            _memmap(os.path.join(self.version_path, f'col_{name}.data'), np.uint8))
+
+    def array(self, name):
+        """Memory-mapped view of a streamed array appended so far."""
+        self._files[f'{name}.rows'].flush()
+        dtype, row_shape = self._streams[name]
+        return _memmap(os.path.join(self.version_path, f'{name}.rows'), dtype, (self.count,) + tuple(row_shape))
+
+    def _finish_stream(self, name):
+        dtype, row_shape = self._streams[name]
+        rows_path = os.path.join(self.version_path, f'{name}.rows')
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (self.count,) + tuple(row_shape)}
+        with open(os.path.join(self.version_path, f'{name}.npy'), 'wb') as out, open(rows_path, 'rb') as rows:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(rows, out, 1 << 20)
+        os.remove(rows_path)
+        self.extra_arrays.append(name)
+
+    def close(self):
+        for f in self._files.values(): f.close()
+        for name in self._streams: self._finish_stream(name)
+        if os.path.exists(os.path.join(self.version_path, CHECKPOINT_FILE)): os.remove(os.path.join(self.version_path, CHECKPOINT_FILE))
+        created_at = time.time()
+        manifest = {
+            'format_version': FORMAT_VERSION, 'version': self.version, 'count': self.count, 'dim': self.dim, 'dtype': self.dtype,
+            'full_precision': self.full_precision,
+            'columns': self.column_names, 'arrays': self.extra_arrays, 'postings': self.extra_postings,
+            'metadata': self.metadata, 'created_at': created_at,
+        }
+        with open(os.path.join(self.version_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2); f.flush(); os.fsync(f.fileno())
+        _write_pointer(self.path, CURRENT_FILE, self.version)
+        os.remove(os.path.join(self.path, BUILDING_FILE))
+        return manifest
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+def _read_pointer(path, name):
+    try:
+        with open(os.path.join(path, name)) as f: return f.read().strip() or None
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+def _write_pointer(path, name, version):
+    """Atomically points `<path>/<name>` at `version`; works on Windows even while the versions are mapped."""
+    pointer = os.path.join(path, name)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version); f.flush(); os.fsync(f.fileno())
+    os.replace(pointer + '.tmp', pointer)
+
+def collect_old_versions(path, keep=KEEP_OLD_VERSIONS):
+    """
+    Deletes the versions older than the current one, except the `keep` newest
+    of them. Files still mapped somewhere (which Windows refuses to delete) are
+    left for a later call.
+    """
+    current = _read_pointer(path, CURRENT_FILE)
+    if current is None: return
+    older = sorted(int(name, 16) for name in os.listdir(path)
+                   if _is_version_name(name) and int(name, 16) < int(current, 16) and os.path.isdir(os.path.join(path, name)))
+    for version in older[:max(len(older) - keep, 0)]:
+        shutil.rmtree(os.path.join(path, f"{version:x}"), ignore_errors=True)
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        # Files of the older single-directory layout, superseded by the first versioned write.
+        for name in os.listdir(path):
+            if name in (CURRENT_FILE, BUILDING_FILE) or not os.path.isfile(os.path.join(path, name)): continue
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+def _is_version_name(name):
+    return len(name) > 0 and all(c in '0123456789abcdef' for c in name)
+
+def write_postings(prefix, postings):
+    """Stores a token -> sorted row-id mapping as a token column plus flat id/offset arrays."""
+    tokens = sorted(postings)
+    lists = [np.asarray(postings[t], dtype=np.int64) for t in tokens]
+    offsets = np.concatenate([[0], np.cumsum([len(l) for l in lists], dtype=np.int64)]).astype(np.int64)
+    tokens_column = StringColumn.from_list(tokens)
+    np.save(prefix + '.postings.tokens_offsets.npy', tokens_column.offsets)
+    np.save(prefix + '.postings.tokens_data.npy', tokens_column.data)
+    np.save(prefix + '.postings.offsets.npy', offsets)
+    np.save(prefix + '.postings.ids.npy', np.concatenate(lists) if lists else np.empty(0, dtype=np.int64))
+
+def read_postings(prefix):
+    tokens = StringColumn(np.load(prefix + '.postings.tokens_offsets.npy'), np.load(prefix + '.postings.tokens_data.npy'))
+    offsets = np.load(prefix + '.postings.offsets.npy')
+    ids = np.load(prefix + '.postings.ids.npy', mmap_mode='r')
+    return {tokens[i]: ids[offsets[i]:offsets[i + 1]] for i in range(len(tokens))}
+
+def write_catalog(path, df, embeddings, dtype='float32', metadata=None, full_precision=False):
+    """Writes a whole DataFrame + embedding matrix in one go; returns the open writer for extras."""
+    writer = CatalogWriter(path, [c for c in df.columns if c != 'profile'], np.asarray(embeddings).shape[1], dtype=dtype, metadata=metadata,
+                           full_precision=full_precision)
+    writer.append({c: df[c].tolist() for c in writer.column_names}, embeddings)
+    return writer
+
+# --- READING ---
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f: return json.load(f)
+
+def version_path(path):
+    """Directory of the current version of the catalog at `path` (`path` itself for the older single-directory layout)."""
+    current = _read_pointer(path, CURRENT_FILE)
+    return os.path.join(path, current) if current else path
+
+def open_catalog(path):
+    path = version_path(path)
+    manifest = read_manifest(path)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Catalog at {path} has format version {manifest.get('format_version')}, expected {FORMAT_VERSION}")
+    shape = (manifest['count'], manifest['dim'])
+    embeddings = _memmap(os.path.join(path, EMBEDDINGS_FILE), manifest['dtype'], shape)
+    if manifest['dtype'] == 'int8':
+        embeddings = vector_index.Int8Vectors(embeddings, _memmap(os.path.join(path, SCALES_FILE), np.float32, shape[:1]))
+    full_embeddings = _memmap(os.path.join(path, FULL_EMBEDDINGS_FILE), np.float32, shape) if manifest.get('full_precision') else None
+    columns = {
+        name: StringColumn(_memmap(os.path.join(path, f'col_{name}.offsets'), np.int64),
+                           _memmap(os.path.join(path, f'col_{name}.data'), np.uint8))
+        for name in manifest['columns']
+    }
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in manifest['arrays']}
+    postings = {name: read_postings(os.path.join(path, name)) for name in manifest['postings']}
+    return Catalog(columns, embeddings, arrays, postings, manifest['metadata'],
+                   index_path=os.path.join(path, INDEX_FILE), path=path, version=manifest['version'], full_embeddings=full_embeddings)
+
+def current_version(path):
+    """Version string of the catalog currently on disk at `path`, or None; cheap enough to poll."""
+    current = _read_pointer(path, CURRENT_FILE)
+    if current: return current
+    try:
+        return read_manifest(path).get('version')
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+
+# --- ROW LOOKUP BY CONTENT HASH ---
+def content_hashes(texts):
+    """64-bit blake2b hash of each string, e.g. to match rows across catalog versions."""
+    return np.array([int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little') for t in texts], dtype=np.uint64)
+
+def hash_lookup(hashes):
+    """(sorted hashes, their rows) for finding rows by hash; 16 bytes per row instead of a dict entry."""
+    hashes = np.asarray(hashes)
+    order = np.argsort(hashes, kind='stable')
+    return hashes[order], order.astype(np.int64)
+
+def first_rows(lookup, hashes):
+    """The (first) row with each of `hashes`, or -1."""
+    sorted_hashes, rows = lookup
+    if len(sorted_hashes) == 0: return np.full(len(hashes), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+    return np.where(sorted_hashes[positions] == hashes, rows[positions], -1)
+
+def matching_rows(lookup, hashes):
+    """Ascending ids of every row whose hash is one of `hashes`."""
+    sorted_hashes, rows = lookup
+    hashes = np.unique(hashes)
+    starts, ends = np.searchsorted(sorted_hashes, hashes, 'left'), np.searchsorted(sorted_hashes, hashes, 'right')
+    matches = [rows[start:end] for start, end in zip(starts, ends) if end > start]
+    return np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+
+def load_legacy_pickle(pickle_path, index_path=None):
+    """Reads the old {'df', 'embeddings', ...} pickle produced before the on-disk format existed."""
+    with open(pickle_path, 'rb') as f: data = pickle.load(f)
+    df = data['df']
+    columns = {c: StringColumn.from_list(['' if _is_missing(v) else v for v in df[c].tolist()]) for c in df.columns if c != 'profile'}
+    embeddings = vector_index.normalize(data['embeddings'])
+    arrays = {'skill_bits': data['skill_bits']} if 'skill_bits' in data else {}
+    metadata = {'skill_vocabulary': data['skill_vocabulary']} if 'skill_vocabulary' in data else {}
+    return Catalog(columns, embeddings, arrays, None, metadata, index_path=index_path, path=pickle_path,
+                   version=f"legacy-{int(os.path.getmtime(pickle_path))}")
+
+def load_catalog(path, legacy_pickle=None, legacy_index=None):
+    """Opens the on-disk catalog at `path`, falling back to a legacy pickle; None if neither exists."""
+    if os.path.exists(os.path.join(version_path(path), MANIFEST_FILE)):
+        catalog = open_catalog(path)
+        collect_old_versions(path)
+        return catalog
+    if legacy_pickle and os.path.exists(legacy_pickle):
+        print(f"Reading legacy catalog {legacy_pickle}; re-run generate_embeddings.py for the memory-mapped format.")
+        return load_legacy_pickle(legacy_pickle, legacy_index)
+    return None
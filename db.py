@@ -0,0 +1,98 @@
+# db.py
+# Shared SQLite access: one long-lived, tuned connection per thread instead of a
+# fresh sqlite3.connect() for every query.
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import tracing
+
+DATABASE_FILE = os.environ.get('PATHFINDER_DB', 'database.db')
+BUSY_TIMEOUT_MS = 5000
+# Prepared statements kept per connection; the app only issues a handful of distinct queries.
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL',          # readers no longer block the writer (and vice versa)
+    'PRAGMA synchronous=NORMAL',        # safe with WAL, avoids an fsync per commit
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}',
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',         # 16 MB page cache per connection
+    'PRAGMA mmap_size=134217728',
+]
+
+# Idempotent upgrades for databases created from an older schema.sql.
+SCHEMA_UPGRADES = [
+    '''CREATE TABLE IF NOT EXISTS user_recommendations (
+        user_id INTEGER PRIMARY KEY,
+        profile_version TEXT NOT NULL,
+        catalog_version TEXT NOT NULL,
+        recommendations TEXT NOT NULL,
+        static_roadmap TEXT NOT NULL,
+        computed_at REAL NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_user_saved_jobs_user_id ON user_saved_jobs (user_id, id)',
+]
+
+_local = threading.local()
+_upgraded, _upgrade_lock = set(), threading.Lock()
+
+def connect(path=None):
+    """A new tuned connection; most code should use get_connection() instead."""
+    path = path or DATABASE_FILE
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    with _upgrade_lock:
+        if path not in _upgraded:
+            _apply_upgrades(conn)
+            _upgraded.add(path)
+    return conn
+
+def _apply_upgrades(conn):
+    try:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.OperationalError:
+        # Tables don't exist yet (init_db.py has not run); schema.sql creates everything.
+        conn.rollback()
+
+def get_connection(path=None):
+    """This thread's pooled connection to `path` (default DATABASE_FILE), opened on first use."""
+    path = path or DATABASE_FILE
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        connections[path] = connect(path)
+    return connections[path]
+
+def query_one(sql, params=(), path=None):
+    with tracing.span('sqlite.read'): return get_connection(path).execute(sql, params).fetchone()
+
+def query_all(sql, params=(), path=None):
+    with tracing.span('sqlite.read'): return get_connection(path).execute(sql, params).fetchall()
+
+@contextmanager
+def transaction(path=None):
+    """Commits on success and rolls back on error."""
+    conn = get_connection(path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def execute(sql, params=(), path=None):
+    with tracing.span('sqlite.write'), transaction(path) as conn:
+        return conn.execute(sql, params)
+
+def close_thread_connections():
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
@@ -0,0 +1,77 @@
+# embedding_cache.py
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+# all-MiniLM-L6-v2 is an uncased model, so case and whitespace never change the embedding.
+from skill_index import normalize_text
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings keyed by normalized text, with hit/miss
+    counters. With `persist_path` set, entries are also kept in a small SQLite
+    file so they survive restarts and are shared between workers.
+    """
+    def __init__(self, encode, maxsize=4096, persist_path=None, namespace=''):
+        self.encode = encode
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.persisted_hits = 0
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL)')
+            self._db.commit()
+
+    def get(self, text):
+        key = self.namespace + normalize_text(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key); self.hits += 1
+                return vector
+            self.misses += 1
+            vector = self._load(key)
+            if vector is not None:
+                self.persisted_hits += 1
+                self._store(key, vector)
+                return vector
+        vector = np.asarray(self.encode(text))
+        vector.setflags(write=False)
+        with self._lock:
+            self._store(key, vector)
+            self._save(key, vector)
+        return vector
+
+    def invalidate(self, text):
+        key = self.namespace + normalize_text(text)
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute('DELETE FROM query_embeddings WHERE key = ?', (key,)); self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'persisted_hits': self.persisted_hits}
+
+    # Callers of the helpers below hold the lock.
+    def _store(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self._db is None: return None
+        row = self._db.execute('SELECT dtype, vector FROM query_embeddings WHERE key = ?', (key,)).fetchone()
+        if row is None: return None
+        return np.frombuffer(row[1], dtype=row[0])
+
+    def _save(self, key, vector):
+        if self._db is None: return
+        self._db.execute('INSERT OR REPLACE INTO query_embeddings (key, dtype, vector) VALUES (?, ?, ?)',
+                         (key, vector.dtype.str, vector.tobytes()))
+        self._db.commit()
@@ -0,0 +1,97 @@
+# encoder_service.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+class BatchingEncoder:
+    """
+    Collects concurrent single-text encode() calls into micro-batches for one
+    batched model.encode() forward pass on a background thread. A text that
+    finds nothing else queued behind it is encoded right away; otherwise the
+    batch keeps taking texts until it holds `max_batch_size`, its oldest text
+    has waited `max_wait` seconds, or no further text arrives in that time.
+    Texts submitted during a forward pass queue up for the next batch. `model`
+    may be assigned after construction, as long as it is set before the first
+    submit().
+    """
+    def __init__(self, model, max_batch_size=32, max_wait=0.005):
+        self.model = model
+        self.max_batch_size, self.max_wait = max_batch_size, max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = self.encoded = self.max_queue_depth = 0
+        self.batch_sizes = {}  # batch size -> number of batches
+        self.total_wait = self.total_encode_time = 0.0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='batching-encoder', daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        """Queues `text`; returns a Future for its embedding."""
+        if self._closed: raise RuntimeError("BatchingEncoder is closed")
+        future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    def encode(self, text):
+        """Drop-in for model.encode(text) on a single string."""
+        return self.submit(text).result()
+
+    def stats(self):
+        with self._lock:
+            return {'queue_depth': self._queue.qsize(), 'max_queue_depth': self.max_queue_depth,
+                    'batches': self.batches, 'encoded': self.encoded,
+                    'mean_batch_size': self.encoded / self.batches if self.batches else 0.0,
+                    'mean_wait_ms': self.total_wait / self.encoded * 1000 if self.encoded else 0.0,
+                    'mean_encode_ms': self.total_encode_time / self.batches * 1000 if self.batches else 0.0,
+                    'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                    'max_batch_size': self.max_batch_size, 'max_wait_ms': self.max_wait * 1000}
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None: return None
+        batch, deadline = [first], first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                # A lone text goes straight to the model; only wait while other requests are arriving.
+                timeout = deadline - time.monotonic()
+                if len(batch) == 1 or timeout <= 0: break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None); break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None: return
+            texts = [text for text, _, _ in batch]
+            started = time.monotonic()
+            try:
+                vectors = np.asarray(self.model.encode(texts, batch_size=len(texts)))
+            except Exception as e:
+                for _, future, _ in batch: future.set_exception(e)
+                continue
+            finished = time.monotonic()
+            # Copy each row out so a cached embedding doesn't keep its whole batch alive.
+            for row, (_, future, _) in enumerate(batch): future.set_result(np.array(vectors[row]))
+            with self._lock:
+                self.batches += 1; self.encoded += len(batch)
+                self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+                self.total_wait += sum(started - queued_at for _, _, queued_at in batch)
+                self.total_encode_time += finished - started
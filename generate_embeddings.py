@@ -1,39 +1,229 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from sentence_transformers import SentenceTransformer
-import pickle
+import vector_index
+import skill_index
+import catalog_store
+import bm25_index
+import job_filters
+from recommender import MODEL_NAME, SEARCH_FIELDS, search_texts
 
+ENCODE_BATCH_SIZE = 256
+# Rows read, encoded and appended per step: memory use depends on this, not on the size of the catalog.
+CHUNK_SIZE = 10000
+# Float32 rows kept back for the quantization report.
+REPORT_SAMPLE_ROWS = 20000
 JOBS_SOURCE_FILE = "data/scraped_jobs_aggregated.csv"
 COURSES_SOURCE_FILE = "data/mock_courses.csv"
-JOBS_OUTPUT_FILE = "data/job_embeddings.pkl"
-COURSES_OUTPUT_FILE = "data/course_embeddings.pkl"
+JOBS_OUTPUT_DIR = "data/jobs_catalog"
+COURSES_OUTPUT_DIR = "data/courses_catalog"
 
-def generate_embeddings(model, source_file, output_file, profile_type):
+def build_profiles(df, profile_type):
+    """The text each row is embedded from."""
+    if profile_type == 'Jobs':
+        return (df['title'].fillna('') + ". " + df['company'].fillna('') + ". " + df['description'].fillna('')).tolist()
+    return (df['title'].fillna('') + ". Skills taught: " + df['skills_taught'].fillna('')).tolist()
+
+# --- ENCODING (in-process or on a pool of worker processes) ---
+_worker_model = None
+
+def _init_worker(model_name, torch_threads):
+    global _worker_model
+    import torch
+    torch.set_num_threads(torch_threads)  # workers split the cores instead of each grabbing all of them
+    _worker_model = SentenceTransformer(model_name)
+
+def _encode_in_worker(texts):
+    return np.asarray(_worker_model.encode(texts, batch_size=ENCODE_BATCH_SIZE), dtype=np.float32)
+
+class Encoder:
+    """Encodes texts in ENCODE_BATCH_SIZE batches, in this process or spread over `workers` processes."""
+    def __init__(self, model_name=MODEL_NAME, workers=1):
+        self.model, self.pool, self._dimension = None, None, None
+        if workers > 1:
+            threads = max(1, (os.cpu_count() or workers) // workers)
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_name, threads))
+        else:
+            self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts):
+        if self.pool is None:
+            return np.asarray(self.model.encode(texts, batch_size=ENCODE_BATCH_SIZE), dtype=np.float32)
+        batches = [texts[i:i + ENCODE_BATCH_SIZE] for i in range(0, len(texts), ENCODE_BATCH_SIZE)]
+        return np.concatenate(list(self.pool.map(_encode_in_worker, batches)))
+
+    def dimension(self):
+        if self._dimension is None: self._dimension = self.encode(['dimension probe']).shape[1]
+        return self._dimension
+
+    def close(self):
+        if self.pool is not None: self.pool.shutdown()
+
+# --- CATALOG GENERATION ---
+def generate_embeddings(encoder, source_file, output_dir, profile_type, dtype='float32', incremental=False, full_precision=False,
+                        chunk_size=CHUNK_SIZE, resume=False):
+    """
+    Streams `source_file` in chunks of `chunk_size` rows: each chunk is encoded
+    (or copied from the previous catalog with `incremental`), appended to the new
+    catalog on disk and checkpointed. With `resume`, a run interrupted part-way
+    continues from its last checkpoint.
+    """
     print(f"\n--- Generating Embeddings for: {profile_type} ---")
     try:
-        df = pd.read_csv(source_file)
+        columns = pd.read_csv(source_file, nrows=0).columns.tolist()
     except FileNotFoundError:
         print(f"Error: Source file not found at {source_file}. Skipping.")
         return
 
-    if profile_type == 'Jobs':
-        df['profile'] = df['title'].fillna('') + ". " + df['company'].fillna('') + ". " + df['description'].fillna('')
-    elif profile_type == 'Courses':
-        df['skills_taught'] = df['skills_taught'].fillna('')
-        df['profile'] = df['title'].fillna('') + ". Skills taught: " + df['skills_taught']
-    
-    profiles = df['profile'].tolist()
-    print(f"Found {len(profiles)} {profile_type.lower()} to process.")
-    embeddings = model.encode(profiles, show_progress_bar=True)
-
-    embedding_data = {'embeddings': embeddings, 'df': df}
-    with open(output_file, 'wb') as f: pickle.dump(embedding_data, f)
-    print(f"Success! {profile_type} embeddings saved to {output_file}")
+    previous = open_previous_catalog(output_dir, dtype) if incremental else None
+    # A row is re-encoded only when the content hash of its profile changed.
+    lookup = catalog_store.hash_lookup(previous.arrays['profile_hash']) if previous is not None else None
+    resume_key = None
+    if resume:
+        stat = os.stat(source_file)
+        resume_key = {'source': os.path.abspath(source_file), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                      'previous': previous.version if previous is not None else None}
+    writer = catalog_store.CatalogWriter(output_dir, columns, encoder.dimension(), dtype=dtype, full_precision=full_precision, resume_key=resume_key,
+                                         metadata={'kind': profile_type, 'model': MODEL_NAME, **skill_index.bits_metadata()})
+    stats = writer.resumed_state or {'encoded': 0, 'reused': 0}
+    if writer.count: print(f"Resuming from checkpoint after {writer.count} rows.")
+    sample, sample_rows = [], 0
+    for chunk in read_chunks(source_file, chunk_size, skip=writer.count):
+        chunk_started = time.perf_counter()
+        profiles = build_profiles(chunk, profile_type)
+        hashes = catalog_store.content_hashes(profiles)
+        reused_rows = catalog_store.first_rows(lookup, hashes) if lookup is not None else np.full(len(hashes), -1, dtype=np.int64)
+        embeddings = encode_chunk(encoder, profiles, previous, reused_rows)
+        writer.append({c: chunk[c].tolist() for c in columns}, embeddings)
+        writer.append_array('profile_hash', hashes)
+        if profile_type == 'Jobs':
+            writer.append_array('skill_bits', chunk_skill_bits(chunk, previous, reused_rows))
+            writer.append_array(job_filters.LINK_HASH_ARRAY, job_filters.link_hashes(chunk['link'].fillna('').astype(str).tolist()))
+        if dtype != 'float32' and sample_rows < REPORT_SAMPLE_ROWS:
+            sample.append(embeddings[:REPORT_SAMPLE_ROWS - sample_rows]); sample_rows += len(sample[-1])
+        stats['reused'] += int((reused_rows >= 0).sum()); stats['encoded'] += int((reused_rows < 0).sum())
+        writer.checkpoint(stats)
+        print(f"  {writer.count} rows written ({stats['encoded']} encoded, {stats['reused']} reused, {len(chunk) / (time.perf_counter() - chunk_started):.0f} rows/s)")
+
+    if previous is not None:
+        removed = int((~np.isin(previous.arrays['profile_hash'], writer.array('profile_hash'))).sum())
+        print(f"Incremental update: {stats['reused']} reused, {stats['encoded']} encoded, {removed} removed.")
+    build_bm25(writer, profile_type)
+    if profile_type == 'Jobs': build_job_filters(writer)
+    build_vector_index(writer.vectors(), writer.add_file(catalog_store.INDEX_FILE), profile_type, previous)
+    manifest = writer.close()
+    if sample:
+        print(f"Ranking agreement of {dtype} vs float32 search (first {sample_rows} rows):")
+        vectors = vector_index.normalize(np.concatenate(sample))
+        vector_index.print_quantization_report(vector_index.quantization_report(vectors, vector_index.quantize(vectors, dtype)))
+    print(f"Success! {manifest['count']} {profile_type.lower()} ({dtype}) saved to {output_dir} as version {manifest['version']}")
+
+def read_chunks(source_file, chunk_size, skip=0):
+    """DataFrames of up to `chunk_size` rows, after dropping the first `skip` rows (already written before a resume)."""
+    for chunk in pd.read_csv(source_file, chunksize=chunk_size):
+        if skip >= len(chunk):
+            skip -= len(chunk); continue
+        yield chunk.iloc[skip:]
+        skip = 0
+
+def open_previous_catalog(output_dir, dtype):
+    """The existing catalog if its vectors can be reused as-is, otherwise None (full rebuild)."""
+    if catalog_store.current_version(output_dir) is None:
+        print("No existing catalog; encoding everything.")
+        return None
+    previous = catalog_store.open_catalog(output_dir)
+    if previous.metadata.get('model') != MODEL_NAME or 'profile_hash' not in previous.arrays or previous.embeddings.dtype != np.dtype(dtype):
+        print("Existing catalog was built with a different model, dtype or without content hashes; encoding everything.")
+        return None
+    return previous
+
+def encode_chunk(encoder, profiles, previous, reused_rows):
+    """Copies vectors of unchanged rows from `previous` and encodes only new or changed rows."""
+    embeddings = np.empty((len(profiles), encoder.dimension()), dtype=np.float32)
+    kept = reused_rows >= 0
+    if kept.any():
+        # Prefer the float32 copy so quantization error isn't compounded run after run.
+        previous_vectors = previous.full_embeddings if previous.full_embeddings is not None else previous.embeddings
+        embeddings[kept] = np.asarray(previous_vectors[reused_rows[kept]], dtype=np.float32)
+    changed = np.flatnonzero(~kept)
+    if len(changed):
+        embeddings[changed] = encoder.encode([profiles[i] for i in changed])
+    return embeddings
+
+def chunk_skill_bits(df, previous=None, reused_rows=None):
+    """Runs the skill matcher once per job row so serving never scans SKILL_SET."""
+    job_texts = (df['title'].fillna('').astype(str) + " " + df['description'].fillna('').astype(str)).tolist()
+    bits = np.zeros((len(df), skill_index.NUM_WORDS), dtype=np.uint64)
+    todo = np.arange(len(df))
+    if previous is not None and 'skill_bits' in previous.arrays and skill_index.bits_current(previous.metadata):
+        kept = reused_rows >= 0
+        bits[kept] = previous.arrays['skill_bits'][reused_rows[kept]]
+        todo = np.flatnonzero(~kept)
+    if len(todo):
+        bits[todo] = skill_index.skill_bits([job_texts[i] for i in todo])
+    return bits
+
+def build_bm25(writer, profile_type):
+    # Built from the columns already on disk, a chunk at a time; cheap next to encoding, so never incremental.
+    builder = bm25_index.BM25Builder()
+    columns = {name: writer.column(name) for name in SEARCH_FIELDS[profile_type] if name in writer.column_names}
+    for start in range(0, writer.count, CHUNK_SIZE):
+        rows = range(start, min(start + CHUNK_SIZE, writer.count))
+        builder.add(search_texts({name: column.take(rows) for name, column in columns.items()}, profile_type))
+    index = builder.finish()
+    bm25_index.save_bm25(index, writer.add_file(catalog_store.BM25_PREFIX))
+    print(f"Built BM25 index for {profile_type} ({len(index.tokens)} terms)")
+
+def build_job_filters(writer):
+    """Posting lists for the job search filters, built from the columns on disk like build_bm25."""
+    names = job_filters.available_filters(writer.column_names)
+    builder = job_filters.FilterPostingsBuilder(names)
+    columns = {name: writer.column(name) for name in job_filters.source_columns(names) if name in writer.column_names}
+    for start in range(0, writer.count, CHUNK_SIZE):
+        rows = range(start, min(start + CHUNK_SIZE, writer.count))
+        builder.add({name: column.take(rows) for name, column in columns.items()})
+    for name, postings in builder.finish().items():
+        writer.add_postings(job_filters.POSTINGS_PREFIX + name, postings)
+        print(f"Built '{name}' filter for Jobs ({len(postings)} values)")
+
+def build_vector_index(vectors, index_file, profile_type, previous=None):
+    """`vectors` are the normalized, memory-mapped embeddings of the new catalog."""
+    centroids = None
+    if previous is not None and os.path.exists(previous.index_path):
+        with np.load(previous.index_path) as data:
+            # Re-using trained centroids keeps an incremental run proportional to the delta plus one assignment pass.
+            if 'centroids' in data: centroids = data['centroids']
+    index = vector_index.build_index(vectors, centroids=centroids, normalized=True)
+    vector_index.save_index(index, index_file)
+    print(f"Built '{index.kind}' vector index for {profile_type} ({len(index)} vectors)")
+    if index.kind == 'ivf':
+        print(f"Recall vs exact search ({len(index.centroids)} lists):")
+        vector_index.print_recall_report(vector_index.recall_report(index))
 
 def main():
+    parser = argparse.ArgumentParser(description="Encode the job and course catalogs into memory-mapped catalog directories.")
+    parser.add_argument('--float16', action='store_true', help="Store embeddings as float16 to halve their size.")
+    parser.add_argument('--int8', action='store_true', help="Store embeddings as int8 with a per-row scale (a quarter of the size).")
+    parser.add_argument('--keep-float32', action='store_true', help="With --float16/--int8, also store a float32 copy used to rerank top candidates.")
+    parser.add_argument('--incremental', action='store_true', help="Only encode rows whose content changed since the last run.")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows read, encoded and written per step.")
+    parser.add_argument('--workers', type=int, default=1, help="Encoder processes; each loads its own copy of the model.")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted run from its last checkpoint.")
+    args = parser.parse_args()
+    dtype = 'int8' if args.int8 else 'float16' if args.float16 else 'float32'
+
     print("Loading pre-trained sentence-transformer model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    generate_embeddings(model, JOBS_SOURCE_FILE, JOBS_OUTPUT_FILE, 'Jobs')
-    generate_embeddings(model, COURSES_SOURCE_FILE, COURSES_OUTPUT_FILE, 'Courses')
+    encoder = Encoder(MODEL_NAME, workers=args.workers)
+    try:
+        for source_file, output_dir, profile_type in [(JOBS_SOURCE_FILE, JOBS_OUTPUT_DIR, 'Jobs'), (COURSES_SOURCE_FILE, COURSES_OUTPUT_DIR, 'Courses')]:
+            generate_embeddings(encoder, source_file, output_dir, profile_type, dtype, args.incremental, args.keep_float32,
+                                chunk_size=args.chunk_size, resume=args.resume)
+    finally:
+        encoder.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
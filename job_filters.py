@@ -0,0 +1,114 @@
+# job_filters.py
+# Structured job search filters (location, remote, source, company). Each filter
+# is stored with the catalog as value -> ascending row-id posting lists, so a
+# filtered search intersects a few id arrays instead of scanning the columns.
+import re
+import numpy as np
+import catalog_store
+from skill_index import normalize_text
+
+# Filter name -> the catalog column its values come from; 'remote' is detected in REMOTE_COLUMNS instead.
+FILTER_COLUMNS = {'location': 'location', 'company': 'company', 'source': 'source', 'remote': None}
+REMOTE_COLUMNS = ('title', 'location', 'description')
+REMOTE_PATTERN = re.compile(r'\b(remote|work from home|wfh)\b', re.IGNORECASE)
+# Filter postings are saved in the catalog as '<POSTINGS_PREFIX><filter>.postings.*'.
+POSTINGS_PREFIX = 'filter_'
+# Per-row 64-bit hash of the link, used to map a user's saved jobs back to catalog rows.
+LINK_HASH_ARRAY = 'link_hash'
+_NO_ROWS = np.empty(0, dtype=np.int64)
+
+# --- POSTING KEYS ---
+def location_keys(location):
+    """'Pune, Maharashtra, India' is found under the whole location and under 'pune', 'maharashtra' and 'india'."""
+    whole = normalize_text(location)
+    if not whole: return []
+    return list(dict.fromkeys([whole] + [part.strip() for part in whole.split(',') if part.strip()]))
+
+def available_filters(column_names):
+    return [name for name, column in FILTER_COLUMNS.items()
+            if column in column_names or (column is None and any(c in column_names for c in REMOTE_COLUMNS))]
+
+def source_columns(names):
+    """Catalog columns the filters in `names` are built from."""
+    columns = {FILTER_COLUMNS[name] for name in names if FILTER_COLUMNS[name]}
+    if 'remote' in names: columns.update(REMOTE_COLUMNS)
+    return sorted(columns)
+
+def filter_keys(name, columns):
+    """Posting keys of each row for filter `name`; `columns` maps column name -> list of strings."""
+    if name == 'remote':
+        texts = [' '.join(parts) for parts in zip(*(columns[c] for c in REMOTE_COLUMNS if c in columns))]
+        return [['yes' if REMOTE_PATTERN.search(text) else 'no'] for text in texts]
+    if name == 'location':
+        return [location_keys(value) for value in columns['location']]
+    return [[key] if key else [] for key in map(normalize_text, columns[FILTER_COLUMNS[name]])]
+
+# --- BUILDING ---
+class FilterPostingsBuilder:
+    """Accumulates each filter's postings one batch of rows at a time, like bm25_index.BM25Builder."""
+    def __init__(self, names):
+        self.names, self.count = list(names), 0
+        self._vocabularies = {name: {} for name in self.names}  # filter -> value -> value id, in first-seen order
+        self._value_ids = {name: [] for name in self.names}
+        self._row_ids = {name: [] for name in self.names}
+
+    def add(self, columns):
+        num_rows = len(next(iter(columns.values()))) if columns else 0
+        for name in self.names:
+            vocabulary, value_ids, row_ids = self._vocabularies[name], [], []
+            for row, keys in enumerate(filter_keys(name, columns), start=self.count):
+                for key in keys:
+                    value_ids.append(vocabulary.setdefault(key, len(vocabulary))); row_ids.append(row)
+            self._value_ids[name].append(np.array(value_ids, dtype=np.int32))
+            self._row_ids[name].append(np.array(row_ids, dtype=np.int64))
+        self.count += num_rows
+
+    def finish(self):
+        """Filter name -> {value: ascending row ids}."""
+        filters = {}
+        for name in self.names:
+            value_ids = np.concatenate(self._value_ids[name]) if self._value_ids[name] else np.empty(0, dtype=np.int32)
+            row_ids = np.concatenate(self._row_ids[name]) if self._row_ids[name] else _NO_ROWS
+            order = np.argsort(value_ids, kind='stable')  # groups postings by value, rows stay ascending
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(value_ids, minlength=len(self._vocabularies[name])))])
+            row_ids = row_ids[order]
+            filters[name] = {value: row_ids[offsets[i]:offsets[i + 1]] for i, value in enumerate(self._vocabularies[name])}
+        return filters
+
+def build_filters(catalog, names):
+    builder = FilterPostingsBuilder(names)
+    builder.add({name: catalog.values(name) for name in source_columns(names) if name in catalog.columns})
+    return builder.finish()
+
+def load_filters(catalog):
+    """The catalog's filter postings; rebuilt in memory if they were not saved with it."""
+    names = available_filters(catalog.columns)
+    if all(POSTINGS_PREFIX + name in catalog.postings for name in names):
+        return {name: catalog.postings[POSTINGS_PREFIX + name] for name in names}
+    print("Job filter postings missing; rebuilding them. Re-run generate_embeddings.py to persist.")
+    return build_filters(catalog, names)
+
+# --- QUERYING ---
+def allowed_ids(filters, criteria):
+    """
+    Ascending ids of the rows matching `criteria` (filter name -> accepted values):
+    any accepted value of a filter matches, and every filter must match. None
+    when `criteria` filters nothing.
+    """
+    matches = []
+    for name, values in criteria.items():
+        if not values: continue
+        postings = filters.get(name, {})
+        lists = [postings.get(normalize_text(value), _NO_ROWS) for value in values]
+        matches.append(np.asarray(lists[0]) if len(lists) == 1 else np.unique(np.concatenate(lists)))
+    if not matches: return None
+    matches.sort(key=len)  # smallest first keeps every intersection small
+    allowed = matches[0]
+    for ids in matches[1:]:
+        allowed = np.intersect1d(allowed, ids, assume_unique=True)
+    return np.asarray(allowed, dtype=np.int64)
+
+# --- SAVED JOBS ---
+def link_hashes(links):
+    """Content hash of each link (see catalog_store.hash_lookup), ignoring surrounding whitespace."""
+    return catalog_store.content_hashes([(link or '').strip() for link in links])
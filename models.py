@@ -1,6 +1,10 @@
 # models.py
 from flask_login import UserMixin
+import json
 import sqlite3
+import threading
+import time
+import db
 
 class User(UserMixin):
     # Add all the new attributes from the database schema
@@ -15,26 +19,68 @@ class User(UserMixin):
         self.degree = degree
         self.skills = skills
 
+def _user_from_row(user_row):
+    return User(id=user_row['id'], username=user_row['username'], password_hash=user_row['password_hash'], 
+                full_name=user_row['full_name'], age=user_row['age'], city=user_row['city'],
+                college=user_row['college'], degree=user_row['degree'], skills=user_row['skills'])
+
+# Flask-Login loads the user on every authenticated request; a page plus its
+# follow-up fetches hit the same row within a second or two.
+USER_CACHE_TTL = 2.0
+_user_cache, _user_cache_lock = {}, threading.Lock()
+
 def get_user_by_id(user_id):
-    connection = sqlite3.connect('database.db')
-    connection.row_factory = sqlite3.Row
-    user_row = connection.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    connection.close()
-    if user_row:
-        # Make sure to pass all the new fields to the User object
-        return User(id=user_row['id'], username=user_row['username'], password_hash=user_row['password_hash'], 
-                    full_name=user_row['full_name'], age=user_row['age'], city=user_row['city'],
-                    college=user_row['college'], degree=user_row['degree'], skills=user_row['skills'])
-    return None
+    key, now = str(user_id), time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(key)
+        if cached and cached[1] > now: return cached[0]
+    user_row = db.query_one('SELECT * FROM users WHERE id = ?', (user_id,))
+    user = _user_from_row(user_row) if user_row else None
+    with _user_cache_lock:
+        if len(_user_cache) > 10000: _user_cache.clear()
+        _user_cache[key] = (user, now + USER_CACHE_TTL)
+    return user
+
+def invalidate_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
 
 def get_user_by_username(username):
-    # This function also needs to be updated to return the full user object
-    connection = sqlite3.connect('database.db')
-    connection.row_factory = sqlite3.Row
-    user_row = connection.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
-    connection.close()
-    if user_row:
-        return User(id=user_row['id'], username=user_row['username'], password_hash=user_row['password_hash'], 
-                    full_name=user_row['full_name'], age=user_row['age'], city=user_row['city'],
-                    college=user_row['college'], degree=user_row['degree'], skills=user_row['skills'])
-    return None
\ No newline at end of file
+    user_row = db.query_one('SELECT * FROM users WHERE username = ?', (username,))
+    return _user_from_row(user_row) if user_row else None
+
+def create_user(username, password_hash):
+    db.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', (username, password_hash))
+
+def update_user_profile(user_id, full_name, age, city, college, degree, skills):
+    db.execute('''UPDATE users SET full_name = ?, age = ?, city = ?, college = ?, degree = ?, skills = ?
+                  WHERE id = ?''', (full_name, age, city, college, degree, skills, user_id))
+    invalidate_user(user_id)
+
+# --- SAVED JOBS ---
+def get_saved_jobs(user_id):
+    return db.query_all('SELECT * FROM user_saved_jobs WHERE user_id = ? ORDER BY id DESC', (user_id,))
+
+def save_job_for_user(user_id, job):
+    """Returns False if the user already saved this link."""
+    try:
+        db.execute('INSERT INTO user_saved_jobs (user_id, job_title, job_company, job_location, job_description, job_link, job_source) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                   (user_id, job['title'], job['company'], job['location'], job['description'], job['link'], job['source']))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+# --- MATERIALIZED RECOMMENDATIONS ---
+def get_materialized_recommendations(user_id):
+    row = db.query_one('SELECT * FROM user_recommendations WHERE user_id = ?', (user_id,))
+    if row:
+        return {'profile_version': row['profile_version'], 'catalog_version': row['catalog_version'],
+                'recommendations': json.loads(row['recommendations']), 'static_roadmap': json.loads(row['static_roadmap'])}
+    return None
+
+def save_materialized_recommendations(user_id, profile_version, catalog_version, recommendations, static_roadmap):
+    db.execute('INSERT OR REPLACE INTO user_recommendations (user_id, profile_version, catalog_version, recommendations, static_roadmap, computed_at) VALUES (?, ?, ?, ?, ?, ?)',
+               (user_id, profile_version, catalog_version, json.dumps(recommendations), json.dumps(static_roadmap), time.time()))
+
+def delete_materialized_recommendations(user_id):
+    db.execute('DELETE FROM user_recommendations WHERE user_id = ?', (user_id,))
@@ -0,0 +1,143 @@
+# recommender.py
+# Catalog loading and result building shared by the Flask app and offline jobs.
+import hashlib
+import os
+import numpy as np
+import vector_index
+import catalog_store
+import skill_index
+import bm25_index
+import job_filters
+import tracing
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+JOBS_CATALOG_DIR = os.environ.get('PATHFINDER_JOBS_CATALOG', 'data/jobs_catalog')
+COURSES_CATALOG_DIR = os.environ.get('PATHFINDER_COURSES_CATALOG', 'data/courses_catalog')
+# Pickles written by older versions of generate_embeddings.py; still readable.
+JOBS_LEGACY_FILE, JOBS_LEGACY_INDEX = 'data/job_embeddings.pkl', 'data/job_index.npz'
+COURSES_LEGACY_FILE, COURSES_LEGACY_INDEX = 'data/course_embeddings.pkl', 'data/course_index.npz'
+# Number of IVF lists scanned per query; higher means better recall, slower search.
+INDEX_NPROBE = int(os.environ.get('PATHFINDER_NPROBE', vector_index.DEFAULT_NPROBE))
+# Text columns the BM25 index covers, per catalog kind.
+SEARCH_FIELDS = {'Jobs': ('title', 'description', 'skills'), 'Courses': ('title', 'skills_taught')}
+# Each retriever contributes k * HYBRID_DEPTH candidates to the fusion.
+HYBRID_DEPTH = 5
+# Job search ranks this many candidates per query and pages through them, so every page comes from the same ranking.
+SEARCH_DEPTH = int(os.environ.get('PATHFINDER_SEARCH_DEPTH', 200))
+STATIC_ROADMAP_SIZE = 10
+
+def load_job_catalog():
+    job_catalog = catalog_store.load_catalog(JOBS_CATALOG_DIR, JOBS_LEGACY_FILE, JOBS_LEGACY_INDEX)
+    if job_catalog is None:
+        print("FATAL: Job embeddings not found. Run generate_embeddings.py"); return None
+    job_catalog.index = vector_index.load_index(job_catalog.index_path, job_catalog.embeddings, nprobe=INDEX_NPROBE, normalized=True,
+                                               rerank_vectors=job_catalog.full_embeddings)
+    if 'skill_bits' not in job_catalog.arrays or not skill_index.bits_current(job_catalog.metadata):
+        print("Skill bitsets missing or stale; rebuilding them. Re-run generate_embeddings.py to persist.")
+        job_catalog.arrays['skill_bits'] = skill_index.skill_bits([t + " " + d for t, d in zip(job_catalog.values('title'), job_catalog.values('description'))])
+    job_catalog.bm25 = load_bm25(job_catalog, 'Jobs')
+    job_catalog.filters = job_filters.load_filters(job_catalog)
+    link_hashes = job_catalog.arrays.get(job_filters.LINK_HASH_ARRAY)
+    if link_hashes is None or len(link_hashes) != len(job_catalog): link_hashes = job_filters.link_hashes(job_catalog.values('link'))
+    job_catalog.link_lookup = catalog_store.hash_lookup(link_hashes)
+    return job_catalog
+
+def load_course_catalog():
+    course_catalog = catalog_store.load_catalog(COURSES_CATALOG_DIR, COURSES_LEGACY_FILE, COURSES_LEGACY_INDEX)
+    if course_catalog is None:
+        print("WARNING: Static course embeddings not found. Run generate_embeddings.py"); return None
+    course_catalog.index = vector_index.load_index(course_catalog.index_path, course_catalog.embeddings, nprobe=INDEX_NPROBE, normalized=True,
+                                                  rerank_vectors=course_catalog.full_embeddings)
+    course_catalog.bm25 = load_bm25(course_catalog, 'Courses')
+    return course_catalog
+
+def search_texts(columns, kind):
+    """BM25 document text of each row: the kind's SEARCH_FIELDS joined; `columns` maps name -> list of strings."""
+    fields = [columns[name] for name in SEARCH_FIELDS[kind] if name in columns]
+    return [' '.join(parts) for parts in zip(*fields)]
+
+def load_bm25(catalog, kind):
+    bm25 = None
+    if os.path.isdir(catalog.path):
+        bm25 = bm25_index.load_bm25(os.path.join(catalog.path, catalog_store.BM25_PREFIX), len(catalog))
+    if bm25 is None:
+        print(f"BM25 index for {kind.lower()} missing or stale; rebuilding it. Re-run generate_embeddings.py to persist.")
+        bm25 = bm25_index.BM25Index.build(search_texts({name: catalog.values(name) for name in SEARCH_FIELDS[kind] if name in catalog.columns}, kind))
+    return bm25
+
+def build_profile_query(degree, skills, college):
+    return f"aspiring {degree or ''} developer with skills in {skills or ''} from {college or ''}"
+
+def profile_version(profile_query):
+    """Content hash of a profile query; stored results are only reused while it matches."""
+    return hashlib.blake2b(profile_query.encode('utf-8'), digest_size=8).hexdigest()
+
+def catalog_version(job_catalog, course_catalog):
+    return f"{getattr(job_catalog, 'version', None)}/{getattr(course_catalog, 'version', None)}"
+
+def top_job_profile(job):
+    return job['title'] + ". " + job['description']
+
+def hybrid_search(catalog, query_texts, query_embeddings, k, allowed=None):
+    """
+    Fuses the vector index's and BM25's top candidates for each query with
+    reciprocal-rank fusion, then scores only the fused ids by cosine. Returns a
+    (scores, ids) pair per query: fusion picks the k ids, which are then ordered
+    by cosine so the displayed match score falls monotonically. `allowed`
+    (ascending row ids) restricts both retrievers to those rows.
+    """
+    depth = min(k * HYBRID_DEPTH, len(catalog) if allowed is None else len(allowed))
+    with tracing.span('vector_search'): _, semantic_ids = catalog.index.search(query_embeddings, depth, allowed=allowed)
+    vectors = catalog.full_embeddings if catalog.full_embeddings is not None else catalog.embeddings
+    results = []
+    for text, embedding, semantic in zip(query_texts, np.atleast_2d(query_embeddings), semantic_ids):
+        with tracing.span('bm25_search'): _, lexical = catalog.bm25.search(text, depth, allowed=allowed)
+        with tracing.span('fuse_and_score'):
+            ids = bm25_index.reciprocal_rank_fusion([semantic, lexical], k)
+            scores = vector_index.score_ids(vectors, embedding, ids)
+            order = np.argsort(-scores, kind='stable')
+            results.append((scores[order], ids[order]))
+    return results
+
+def search_jobs(catalog, query_text, query_embedding, allowed=None, offset=0, limit=10, excluded=None):
+    """
+    One page of hybrid search results over the `allowed` rows (None: all of them),
+    skipping `excluded` ids (ascending). Every page cuts from the same top
+    SEARCH_DEPTH ranking, so `offset` is a position in it; returns (scores, ids,
+    offset of the next page or None).
+    """
+    k = min(SEARCH_DEPTH, len(catalog) if allowed is None else len(allowed))
+    if k == 0: return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64), None
+    [(scores, ids)] = hybrid_search(catalog, [query_text], query_embedding, k, allowed)
+    positions = np.arange(offset, len(ids))
+    if excluded is not None and len(excluded): positions = positions[~vector_index.in_sorted(ids[offset:], excluded)]
+    page = positions[:limit]
+    return scores[page], ids[page], int(page[-1]) + 1 if len(positions) > limit else None
+
+def job_results(catalog, scores, ids, user_skill_bits):
+    """
+    Turns one row of index search output into the job dicts the dashboard
+    renders. Columns, skill bitsets and scores are gathered for all hits at
+    once, so the cost is a few array passes plus one decode per value.
+    """
+    found = ids >= 0
+    scores, ids = np.asarray(scores, dtype=np.float64)[found], ids[found]
+    job_skill_bits = np.asarray(catalog.arrays['skill_bits'][ids])
+    similarity_scores = [f"{score:.2f}" for score in ((scores + 1) / 2 * 100).tolist()]
+    required_skills = skill_index.decode_rows(job_skill_bits)
+    skills_gaps = skill_index.decode_rows(skill_index.skills_gap(job_skill_bits, user_skill_bits))
+    recommendations = catalog.rows(ids)
+    for job_details, score, required, gap in zip(recommendations, similarity_scores, required_skills, skills_gaps):
+        job_details['similarity_score'], job_details['required_skills'], job_details['skills_gap'] = score, required, gap
+    return recommendations
+
+def static_roadmap(catalog, job_title, query_embedding):
+    """Courses close to the job profile embedding (cosine > 0.3) fused with BM25 matches for the job title."""
+    if catalog is None: return []
+    scores, ids = catalog.index.search(query_embedding, min(5, len(catalog)))
+    semantic = ids[0][(ids[0] >= 0) & (scores[0] > 0.3)]
+    _, lexical = catalog.bm25.search(job_title, STATIC_ROADMAP_SIZE)
+    final_static_roadmap, seen_links = [], set()
+    for course in catalog.rows(bm25_index.reciprocal_rank_fusion([semantic, lexical], STATIC_ROADMAP_SIZE).tolist()):
+        if course['link'] not in seen_links: final_static_roadmap.append(course); seen_links.add(course['link'])
+    return final_static_roadmap
@@ -0,0 +1,97 @@
+# roadmap_cache.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from skill_index import normalize_text
+
+class RoadmapCache:
+    """
+    TTL + LRU cache of live roadmap results keyed by normalized job title.
+
+    get() never blocks on a scrape: a fresh entry is returned as-is, a stale one
+    is returned while a background refresh runs (stale-while-revalidate), and a
+    miss returns None after scheduling a fetch. Concurrent requests for the same
+    title share a single in-flight fetch.
+
+    The scrapers return [] when they fail, so an empty result is only fresh for
+    `empty_ttl` and never replaces an earlier non-empty one: it is retried soon
+    instead of hiding live resources for the full `ttl`.
+    """
+    def __init__(self, fetch, ttl=6 * 3600, stale_ttl=24 * 3600, maxsize=1024, max_workers=2, empty_ttl=60):
+        self.fetch = fetch
+        self.ttl, self.stale_ttl, self.maxsize, self.empty_ttl = ttl, stale_ttl, maxsize, empty_ttl
+        self._entries = OrderedDict()  # key -> (value, fetched_at, ttl)
+        self._inflight = {}            # key -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='roadmap-refresh')
+        self.hits = self.stale_hits = self.misses = 0
+
+    def get(self, title):
+        key, now = normalize_text(title), time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at, ttl = entry
+                age = now - fetched_at
+                if age < ttl:
+                    self._entries.move_to_end(key); self.hits += 1
+                    return value
+                if age < ttl + self.stale_ttl:
+                    self._entries.move_to_end(key); self.stale_hits += 1
+                    self._refresh(key, title)
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            self._refresh(key, title)
+            return None
+
+    def get_or_wait(self, title, timeout=None):
+        """Like get(), but on a miss waits up to `timeout` seconds for the fetch to finish."""
+        value = self.get(title)
+        if value is not None: return value
+        future = self.pending(title)
+        if future is None: return self.get(title)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def pending(self, title):
+        """The in-flight fetch for `title` as a concurrent.futures.Future, or None."""
+        with self._lock:
+            return self._inflight.get(normalize_text(title))
+
+    def invalidate(self, title):
+        with self._lock:
+            self._entries.pop(normalize_text(title), None)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'inflight': len(self._inflight),
+                    'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses}
+
+    def _refresh(self, key, title):
+        # Caller holds the lock.
+        if key not in self._inflight:
+            self._inflight[key] = self._executor.submit(self._fetch_and_store, key, title)
+
+    def _fetch_and_store(self, key, title):
+        try:
+            value = self.fetch(title)
+            with self._lock:
+                ttl = self.ttl
+                if not value:
+                    ttl, previous = self.empty_ttl, self._entries.get(key)
+                    if previous is not None and previous[0]: value = previous[0]  # keep serving the last good result
+                self._entries[key] = (value, time.monotonic(), ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return value
+        except Exception as e:
+            print(f"  - [RoadmapCache] Refresh for '{title}' failed: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
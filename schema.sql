@@ -1,6 +1,7 @@
 -- Delete existing tables to apply the new structure
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS user_saved_jobs;
+DROP TABLE IF EXISTS user_recommendations;
 
 -- Create the new, more detailed users table
 CREATE TABLE users (
@@ -27,4 +28,20 @@ CREATE TABLE user_saved_jobs (
     job_source TEXT,
     FOREIGN KEY (user_id) REFERENCES users (id),
     UNIQUE(user_id, job_link)
-);
\ No newline at end of file
+);
+
+-- /profile lists a user's saved jobs newest first
+CREATE INDEX idx_user_saved_jobs_user_id ON user_saved_jobs (user_id, id);
+
+-- Materialized dashboard results (written by the app and batch_recommend.py).
+-- Reused only while profile_version (hash of the profile query) and
+-- catalog_version (job/course catalog versions) still match.
+CREATE TABLE user_recommendations (
+    user_id INTEGER PRIMARY KEY,
+    profile_version TEXT NOT NULL,
+    catalog_version TEXT NOT NULL,
+    recommendations TEXT NOT NULL, -- JSON list of job dicts, best match first
+    static_roadmap TEXT NOT NULL, -- JSON list of course dicts for the top job
+    computed_at REAL NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
@@ -1,9 +1,7 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from . import runtime
 
 def scrape(query, limit=4):
     """
@@ -13,20 +11,14 @@ def scrape(query, limit=4):
     
     # --- The main try...except block to catch ALL errors ---
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--log-level=3")
-        options.add_argument("--disable-gpu") # Often helps in headless mode
-        options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        
-        # Use a context manager for the driver to ensure it always quits
-        with webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options) as driver:
+        # Borrow a warm browser from the shared pool; it goes back to the pool afterwards
+        with runtime.browser() as driver:
             wait = WebDriverWait(driver, 10)
             
             search_query = query.replace(' ', '%20')
             url = f"https://www.coursera.org/search?query={search_query}"
             
-            driver.get(url)
+            driver.get(runtime.resolve_url(url))
             
             # Wait for results to be present
             wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-e2e="product-card"]')))
@@ -0,0 +1,176 @@
+# scrapers/dedup.py
+"""
+Ingest-time dedup of scraped job postings. Links are reduced to a canonical
+form (tracking parameters stripped, LinkedIn views reduced to the posting id),
+then postings whose title + company + location are near-identical are
+collapsed with MinHash/LSH into the first one seen. Two postings that carry
+different ids from the same site, or whose titles name different levels
+("Engineer I" / "Engineer II"), are never collapsed.
+
+    python -m scrapers.dedup data/scraped_jobs_aggregated.csv --report merges.csv
+"""
+import argparse
+import csv
+import os
+import re
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import numpy as np
+
+# --- DEDUP SETTINGS ---
+# Estimated Jaccard similarity of title+company+location shingles above which two postings are one job.
+DEDUP_THRESHOLD = float(os.environ.get('PATHFINDER_DEDUP_THRESHOLD', 0.9))
+NUM_PERM = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity share a bucket with high probability
+SHINGLE_SIZE = 4
+# Per-request query parameters that don't identify the posting.
+TRACKING_PARAMS = {'refid', 'trackingid', 'position', 'pagenum', 'trk', 'originalsubdomain', 'from', 'vjs', 'tk'}
+LINKEDIN_JOB_ID = re.compile(r'/jobs/view/(?:[^/]*-)?(\d+)/?$')
+# Title words that tell otherwise identical roles apart.
+LEVEL_WORDS = {'i', 'ii', 'iii', 'iv', 'v', '1', '2', '3', '4', '5', 'jr', 'junior', 'sr', 'senior', 'lead', 'principal', 'staff',
+               'intern', 'trainee', 'associate'}
+_MERSENNE_PRIME = (1 << 31) - 1
+
+# --- CANONICAL LINKS ---
+def canonical_link(link):
+    """The link without tracking parameters or fragment; LinkedIn postings become linkedin.com/jobs/view/<id>."""
+    if not link: return link
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.endswith('linkedin.com'):
+        match = LINKEDIN_JOB_ID.search(parts.path)
+        if match: return f"https://www.linkedin.com/jobs/view/{match.group(1)}"
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')]
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip('/') or '/', urlencode(sorted(query)), ''))
+
+def posting_id(link):
+    """(site, posting id) of a canonical link from a site that gives postings stable ids, otherwise None."""
+    parts = urlsplit(link or '')
+    if parts.netloc.endswith('linkedin.com'):
+        match = LINKEDIN_JOB_ID.search(parts.path)
+        if match: return ('linkedin', match.group(1))
+    if 'indeed.' in parts.netloc:
+        jk = dict(parse_qsl(parts.query)).get('jk')
+        if jk: return ('indeed', jk)
+    return None
+
+# --- MINHASH / LSH ---
+def normalize_text(text):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', (text or '').lower()).split())
+
+def posting_key(job):
+    return ' | '.join(normalize_text(job.get(field)) for field in ('title', 'company', 'location'))
+
+def title_levels(job):
+    return frozenset(normalize_text(job.get('title')).split()) & LEVEL_WORDS
+
+def shingles(text, size=SHINGLE_SIZE):
+    text = text if len(text) >= size else text.ljust(size)
+    return np.unique(np.array([zlib.crc32(text[i:i + size].encode('utf-8')) & _MERSENNE_PRIME
+                               for i in range(len(text) - size + 1)], dtype=np.uint64))
+
+class NearDuplicateFilter:
+    """
+    Remembers the postings kept so far. add() returns None for a new posting,
+    or the canonical link of the kept posting it duplicates; `merges` maps each
+    kept link to the (link, similarity) pairs of distinct postings collapsed into it.
+    """
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, bands=LSH_BANDS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.threshold, self.bands, self.rows = threshold, bands, num_perm // bands
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._links = {}      # canonical link -> kept link it resolves to
+        self._buckets = {}    # (band, band hash) -> kept links
+        self._signatures = {}  # kept link -> signature
+        self._identity = {}    # kept link -> ({site: posting id} of it and the postings merged into it, title levels)
+        self.merges = {}
+        self.kept = self.merged_links = self.merged_similar = 0
+
+    def signature(self, job):
+        hashes = shingles(posting_key(job))
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+
+    def _bands(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, job):
+        link = canonical_link(job['link'])
+        if link in self._links:
+            self.merged_links += 1
+            return self._links[link]
+        signature = self.signature(job)
+        posting, levels = posting_id(link), title_levels(job)
+        best, best_similarity = None, self.threshold
+        for key in self._bands(signature):
+            for candidate in self._buckets.get(key, ()):
+                candidate_sites, candidate_levels = self._identity[candidate]
+                # Same site, different id: two postings, however alike (equal ids were caught as repeated links).
+                if posting and posting[0] in candidate_sites: continue
+                if levels != candidate_levels: continue
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= best_similarity: best, best_similarity = candidate, similarity
+        if best is not None:
+            self._links[link] = best
+            self.merged_similar += 1
+            self.merges.setdefault(best, []).append((link, best_similarity))
+            if posting: self._identity[best][0][posting[0]] = posting[1]
+            return best
+        self._links[link] = link
+        self._signatures[link] = signature
+        self._identity[link] = (dict([posting]) if posting else {}, levels)
+        for key in self._bands(signature): self._buckets.setdefault(key, []).append(link)
+        self.kept += 1
+        return None
+
+    def summary(self):
+        return (f"{self.kept} kept, {self.merged_links} dropped as repeated links, "
+                f"{self.merged_similar} collapsed as near-duplicates")
+
+def dedup_jobs(jobs, threshold=DEDUP_THRESHOLD):
+    """Returns (kept jobs with canonical links, NearDuplicateFilter holding the merges), in input order."""
+    dedup, kept = NearDuplicateFilter(threshold), []
+    for job in jobs:
+        if dedup.add(job) is None: kept.append(dict(job, link=canonical_link(job['link'])))
+    return kept, dedup
+
+# --- REPORTING ---
+def print_merge_report(kept, dedup, limit=10):
+    by_link = {job['link']: job for job in kept}
+    print(f"Dedup: {dedup.summary()}.")
+    for kept_link, duplicates in sorted(dedup.merges.items(), key=lambda item: -len(item[1]))[:limit]:
+        job = by_link.get(kept_link, {})
+        print(f"  {job.get('title')} | {job.get('company')} | {job.get('location')}  <- {len(duplicates)} merged")
+        for link, similarity in duplicates[:3]: print(f"      {similarity:.2f}  {link}")
+
+def write_merge_report(dedup, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['kept_link', 'merged_link', 'similarity'])
+        for kept_link, duplicates in dedup.merges.items():
+            for link, similarity in duplicates: writer.writerow([kept_link, link, f"{similarity:.3f}"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Collapse duplicate and near-duplicate postings in a scraped jobs CSV.")
+    parser.add_argument('input')
+    parser.add_argument('--output', help="Where to write the deduplicated CSV (defaults to overwriting the input).")
+    parser.add_argument('--threshold', type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument('--report', help="Also write every merge to this CSV.")
+    args = parser.parse_args()
+
+    with open(args.input, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames, jobs = reader.fieldnames, list(reader)
+    kept, dedup = dedup_jobs(jobs, args.threshold)
+    print_merge_report(kept, dedup)
+    output = args.output or args.input
+    with open(output + '.tmp', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader(); writer.writerows(kept)
+    os.replace(output + '.tmp', output)
+    if args.report: write_merge_report(dedup, args.report)
+    print(f"Wrote {len(kept)} of {len(jobs)} jobs to {output}")
+
+if __name__ == "__main__":
+    main()
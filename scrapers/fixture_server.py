@@ -0,0 +1,113 @@
+# scrapers/fixture_server.py
+"""
+A local stand-in for the scraped sites, serving the HTML in scrapers/fixtures/.
+Requests arrive as /<original host>/<original path> (see runtime.resolve_url),
+so pointing SCRAPER_BASE_URL at this server runs every scraper offline.
+
+    python -m scrapers.fixture_server                   # serve on 127.0.0.1:8765
+    python -m scrapers.fixture_server --bench 500       # offline throughput benchmark
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_FILES = {
+    'www.linkedin.com': 'linkedin.html',
+    'www.indeed.com': 'indeed.html',
+    'www.youtube.com': 'youtube.html',
+}
+# LinkedIn's guest API returns pages of results until `start` runs past the end.
+LINKEDIN_FIXTURE_PAGES = 3
+FIXTURE_JOB_ID = re.compile(r'fixture-job-(\d+)')
+
+def _load_fixtures():
+    fixtures = {}
+    for host, name in FIXTURE_FILES.items():
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f: fixtures[host] = f.read()
+    return fixtures
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    fixtures = {}
+    latency = 0.0
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection pooling shows up in the numbers
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        host = parts.path.lstrip('/').split('/', 1)[0]
+        body = self.fixtures.get(host)
+        if body is None:
+            self.send_error(404); return
+        if host == 'www.linkedin.com':
+            start = int(parse_qs(parts.query).get('start', ['0'])[0])
+            # Distinct posting ids per page (dedup keys LinkedIn links on the id), and an empty page once the fixture "runs out".
+            body = FIXTURE_JOB_ID.sub(lambda m: f'fixture-job-{int(m.group(1)) + start * 1000}', body) if start < LINKEDIN_FIXTURE_PAGES * 25 else ''
+        if self.latency: time.sleep(self.latency)
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host='127.0.0.1', port=0, latency=0.0):
+    """Starts the server on a daemon thread; returns (server, base_url)."""
+    handler = type('Handler', (FixtureHandler,), {'fixtures': _load_fixtures(), 'latency': latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def benchmark(num_requests, concurrency, latency):
+    from . import runtime, linkedin_scraper, youtube_scraper, indeed_scraper
+    server, base_url = start_server(latency=latency)
+    runtime.BASE_URL_OVERRIDE = base_url
+    calls = [(linkedin_scraper.scrape, ('junior python developer', 'Remote')),
+             (indeed_scraper.scrape, ('junior python developer', 'Remote')),
+             (youtube_scraper.scrape, ('python developer',))]
+    latencies = []
+
+    def one(i):
+        scrape, args = calls[i % len(calls)]
+        start = time.perf_counter()
+        scrape(*args)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(num_requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"\n{num_requests} scrapes, concurrency {concurrency}, server latency {latency * 1000:.0f} ms")
+    print(f"  throughput: {num_requests / elapsed:.1f} scrapes/s")
+    print(f"  latency ms: p50 {pct(0.50):.1f}  p95 {pct(0.95):.1f}  p99 {pct(0.99):.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve scraper fixtures locally, or benchmark scrapers against them.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Artificial per-response delay in seconds.")
+    parser.add_argument('--bench', type=int, metavar='N', help="Run N scrapes against an in-process server and report throughput.")
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench, args.concurrency, args.latency); return
+    server, base_url = start_server(port=args.port, latency=args.latency)
+    print(f"Serving scraper fixtures at {base_url}; run scrapers with SCRAPER_BASE_URL={base_url}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
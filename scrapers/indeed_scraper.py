@@ -2,24 +2,22 @@
 
 import requests
 from bs4 import BeautifulSoup
-import time
+from . import runtime
 
-def scrape(keywords, location):
+SOURCE = 'Indeed'
+
+def scrape(keywords, location, start=0):
     """
     Scrapes Indeed.com for a given set of keywords and location.
+    `start` is the result offset of the page to fetch.
     Returns a list of job dictionaries in the standardized format.
     """
-    print(f"  > [Indeed] Scraping for: '{keywords}' in '{location}'")
+    print(f"  > [Indeed] Scraping for: '{keywords}' in '{location}' (start={start})")
 
-    url = f"https://www.indeed.com/jobs?q={keywords.replace(' ', '+')}&l={location.replace(' ', '+')}"
+    url = f"https://www.indeed.com/jobs?q={keywords.replace(' ', '+')}&l={location.replace(' ', '+')}&start={start}"
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
-    }
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = runtime.fetch(url)
     except requests.exceptions.RequestException as e:
         print(f"  - [Indeed] Error fetching page: {e}")
         return []
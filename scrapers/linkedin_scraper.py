@@ -2,24 +2,22 @@
 
 import requests
 from bs4 import BeautifulSoup
-import time
+from . import runtime
 
-def scrape(keywords, location):
+SOURCE = 'LinkedIn'
+
+def scrape(keywords, location, start=0):
     """
     Scrapes LinkedIn for a given set of keywords and location.
+    `start` is the result offset of the page to fetch.
     Returns a list of job dictionaries.
     """
-    print(f"  > [LinkedIn] Scraping for: '{keywords}' in '{location}'")
-    
-    url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keywords.replace(' ', '%20')}&location={location.replace(' ', '%20')}&start=0"
+    print(f"  > [LinkedIn] Scraping for: '{keywords}' in '{location}' (start={start})")
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
-    }
+    url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keywords.replace(' ', '%20')}&location={location.replace(' ', '%20')}&start={start}"
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status() # Raise an exception for bad status codes
+        response = runtime.fetch(url)
     except requests.exceptions.RequestException as e:
         print(f"  - [LinkedIn] Error fetching page: {e}")
         return [] # Return an empty list on failure
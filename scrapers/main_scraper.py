@@ -1,7 +1,11 @@
+import argparse
 import csv
-import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from . import linkedin_scraper
+from .runtime import TokenBucket
+from .dedup import NearDuplicateFilter, canonical_link, print_merge_report
 # from . import indeed_scraper # Temporarily disabled as it gets blocked
 
 SEARCH_QUERIES = [
@@ -17,42 +21,125 @@ ACTIVE_SCRAPERS = [
     # indeed_scraper, 
 ]
 
+# Requests per second and burst size allowed against each source.
+SOURCE_RATE_LIMITS = {'LinkedIn': (1.0, 2), 'Indeed': (0.5, 1)}
+DEFAULT_RATE_LIMIT = (1.0, 1)
+MAX_WORKERS = 8
+MAX_PAGES = 5
+
 # Robustly define the output file path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_FILE_NAME = os.path.join(PROJECT_ROOT, "data", "scraped_jobs_aggregated.csv")
+FIELDNAMES = ['title', 'company', 'location', 'description', 'link', 'source', 'skills']
+
+class StreamingJobWriter:
+    """
+    Appends unique jobs to `<output>.partial` as they arrive and renames it
+    onto the output file when the run finishes. Jobs are stored under their
+    canonical link, and repeats or near-duplicates of a job already written are
+    dropped (see scrapers.dedup). A crashed run leaves the partial file behind;
+    resume=True picks up from it.
+    """
+    def __init__(self, output_file, resume=False):
+        self.output_file, self.partial_file = output_file, output_file + '.partial'
+        self.dedup, self.count = NearDuplicateFilter(), 0
+        self.kept_jobs = []  # title/company/location/link of each written job, for the merge report
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        resuming = resume and os.path.exists(self.partial_file)
+        if resuming:
+            with open(self.partial_file, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    if self.dedup.add(row) is None: self._remember(row)
+            print(f"Resuming from {self.partial_file} ({self.count} jobs already saved).")
+        self._file = open(self.partial_file, 'a' if resuming else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction='ignore')
+        if not resuming: self._writer.writeheader()
+
+    def write(self, jobs):
+        """Writes the jobs not seen before; returns how many were new."""
+        with self._lock:
+            new_jobs = [dict(job, link=canonical_link(job['link'])) for job in jobs if self.dedup.add(job) is None]
+            for job in new_jobs: self._remember(job)
+            self._writer.writerows(new_jobs)
+            self._file.flush()
+            return len(new_jobs)
+
+    def _remember(self, job):
+        self.kept_jobs.append({key: job.get(key) for key in ('title', 'company', 'location')} | {'link': canonical_link(job['link'])})
+        self.count += 1
+
+    def close(self, finalize=True):
+        self._file.close()
+        print_merge_report(self.kept_jobs, self.dedup)
+        if not finalize:
+            print(f"Run interrupted; {self.count} jobs kept in {self.partial_file}. Re-run with --resume to continue.")
+        elif self.count:
+            os.replace(self.partial_file, self.output_file)
+        else:
+            os.remove(self.partial_file)
+
+def crawl(scraper_module, query, bucket, writer, max_pages=MAX_PAGES, stop=None):
+    """Fetches successive result pages for one query until a page is empty, adds nothing new, or `stop` is set."""
+    start, total_new = 0, 0
+    for _ in range(max_pages):
+        if stop is not None and stop.is_set(): break
+        bucket.acquire()
+        results = scraper_module.scrape(query["keywords"], query["location"], start=start)
+        if not results: break
+        new = writer.write(results)
+        total_new += new
+        if new == 0: break
+        start += len(results)
+    return total_new
+
+def load_queries(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [{"keywords": row["keywords"], "location": row["location"]} for row in csv.DictReader(f)]
 
 def main():
-    print("Starting AGGREGATED job scraper...")
-    all_scraped_data = []
-    seen_links = set()
-
-    for query in SEARCH_QUERIES:
-        keywords = query["keywords"]
-        location = query["location"]
-        print(f"\n--- Running scrapers for: '{keywords}' in '{location}' ---")
-
-        for scraper_module in ACTIVE_SCRAPERS:
-            results = scraper_module.scrape(keywords, location)
-            for job in results:
-                if job['link'] not in seen_links:
-                    all_scraped_data.append(job)
-                    seen_links.add(job['link'])
-            time.sleep(1)
-
-    if all_scraped_data:
-        print(f"\nTotal unique jobs scraped: {len(all_scraped_data)}")
-        print(f"Saving all jobs to {OUTPUT_FILE_NAME}...")
-        
-        os.makedirs(os.path.dirname(OUTPUT_FILE_NAME), exist_ok=True)
-        
-        fieldnames = ['title', 'company', 'location', 'description', 'link', 'source', 'skills']
-        with open(OUTPUT_FILE_NAME, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(all_scraped_data)
+    parser = argparse.ArgumentParser(description="Scrape and aggregate job postings.")
+    parser.add_argument('--queries', help="CSV file with keywords,location columns (defaults to SEARCH_QUERIES).")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES)
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted run from its .partial file.")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else SEARCH_QUERIES
+    buckets = {m: TokenBucket(*SOURCE_RATE_LIMITS.get(getattr(m, 'SOURCE', m.__name__), DEFAULT_RATE_LIMIT)) for m in ACTIVE_SCRAPERS}
+    print(f"Starting AGGREGATED job scraper: {len(queries)} queries x {len(ACTIVE_SCRAPERS)} sources, {args.workers} workers...")
+    writer = StreamingJobWriter(OUTPUT_FILE_NAME, resume=args.resume)
+    executor, stop, finished = ThreadPoolExecutor(max_workers=args.workers), threading.Event(), False
+    try:
+        futures = {executor.submit(crawl, m, q, buckets[m], writer, args.max_pages, stop): (m, q) for q in queries for m in ACTIVE_SCRAPERS}
+        for future in as_completed(futures):
+            scraper_module, query = futures[future]
+            try:
+                new = future.result()
+                print(f"--- {getattr(scraper_module, 'SOURCE', scraper_module.__name__)}: '{query['keywords']}' in '{query['location']}' -> {new} new jobs")
+            except Exception as e:
+                print(f"--- '{query['keywords']}' in '{query['location']}' failed: {e}")
+        finished = True
+    except KeyboardInterrupt:
+        print("Interrupted; cancelling queued queries and letting in-flight pages finish...")
+    finally:
+        # Queued crawls are cancelled and running ones stop after their current page. The writer is
+        # only closed once every worker has joined, even if Ctrl-C is pressed again while waiting.
+        stop.set()
+        while True:
+            try:
+                executor.shutdown(wait=True, cancel_futures=True); break
+            except KeyboardInterrupt:
+                print("Still waiting for in-flight pages to finish...")
+        writer.close(finalize=finished)
+    if not finished: raise SystemExit(130)  # interrupted: the partial file is kept for --resume
+
+    if writer.count:
+        print(f"\nTotal unique jobs scraped: {writer.count}")
+        print(f"Saved all jobs to {OUTPUT_FILE_NAME}")
         print("Scraping complete!")
     else:
         print("No data was scraped.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
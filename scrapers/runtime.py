@@ -0,0 +1,154 @@
+# scrapers/runtime.py
+"""
+Shared runtime for all scrapers: one pooled HTTP session with per-host
+concurrency limits, timeouts and retry-with-backoff, plus a bounded pool of
+warm headless Chrome instances for the Selenium-based scrapers.
+"""
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
+}
+DEFAULT_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+HOST_CONCURRENCY = 4
+HOST_CONCURRENCY_OVERRIDES = {'www.linkedin.com': 2, 'www.indeed.com': 2}
+BROWSER_POOL_SIZE = int(os.environ.get('SCRAPER_BROWSER_POOL_SIZE', 2))
+# Set to e.g. http://127.0.0.1:8765 to send every request to scrapers/fixture_server.py instead of the real sites.
+BASE_URL_OVERRIDE = os.environ.get('SCRAPER_BASE_URL')
+
+# --- HTTP ---
+_session = requests.Session()
+_session.headers.update(DEFAULT_HEADERS)
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+def _host_semaphore(host):
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(HOST_CONCURRENCY_OVERRIDES.get(host, HOST_CONCURRENCY))
+        return _host_semaphores[host]
+
+def resolve_url(url):
+    """Rewrites `url` onto BASE_URL_OVERRIDE (as <base>/<host><path>) when offline mode is on."""
+    if not BASE_URL_OVERRIDE: return url
+    parts = urlsplit(url)
+    return f"{BASE_URL_OVERRIDE.rstrip('/')}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+
+def fetch(url, headers=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES):
+    """
+    GET `url` through the shared session. Connection errors, timeouts and
+    429/5xx responses are retried with exponential backoff and jitter; the last
+    failure is raised as a requests.exceptions.RequestException.
+    """
+    host = urlsplit(url).netloc
+    url = resolve_url(url)
+    for attempt in range(retries + 1):
+        try:
+            with _host_semaphore(host):
+                response = _session.get(url, headers=headers, timeout=timeout)
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                raise requests.exceptions.HTTPError(f"{response.status_code} from {host}", response=response)
+            response.raise_for_status()
+            return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            if attempt >= retries or (status is not None and status not in RETRY_STATUS_CODES):
+                raise
+            time.sleep(BACKOFF_BASE * (2 ** attempt) * (1 + random.random()))
+
+# --- RATE LIMITING ---
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second on average, bursts of up to `capacity`."""
+    def __init__(self, rate, capacity=1):
+        self.rate, self.capacity = rate, capacity
+        self._tokens, self._updated = float(capacity), time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# --- HEADLESS BROWSERS ---
+class BrowserPool:
+    """A bounded pool of warm headless Chrome drivers, created lazily and reused across scrapes."""
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._driver_path = None
+        self._lock = threading.Lock()
+
+    def _create(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+        with self._lock:
+            if self._driver_path is None:
+                # Resolving/downloading chromedriver is slow; do it once per process.
+                self._driver_path = ChromeDriverManager().install()
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--log-level=3")
+        options.add_argument("--disable-gpu")
+        options.add_experimental_option('excludeSwitches', ['enable-logging'])
+        return webdriver.Chrome(service=Service(self._driver_path), options=options)
+
+    @contextmanager
+    def browser(self, timeout=30):
+        """Borrows a driver; a driver that raised is discarded instead of returned to the pool."""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No headless browser became available")
+        driver = None
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._create()
+            yield driver
+            self._idle.put(driver); driver = None
+        finally:
+            if driver is not None:
+                _quit(driver)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+browser_pool = BrowserPool(BROWSER_POOL_SIZE)
+browser = browser_pool.browser
+atexit.register(browser_pool.close)
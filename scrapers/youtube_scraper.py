@@ -1,5 +1,5 @@
-import requests
 from bs4 import BeautifulSoup
+from . import runtime
 
 def scrape(query, limit=4):
     """
@@ -11,10 +11,7 @@ def scrape(query, limit=4):
     try:
         search_query = (query + " tutorial for beginners").replace(' ', '+')
         url = f"https://www.youtube.com/results?search_query={search_query}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status() # Will raise an exception for 4xx/5xx errors
+        response = runtime.fetch(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
 
         soup = BeautifulSoup(response.text, 'html.parser')
         video_results = soup.find_all('ytd-video-renderer', class_='style-scope ytd-item-section-renderer', limit=limit)
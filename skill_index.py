@@ -0,0 +1,124 @@
+# skill_index.py
+import re
+from collections import deque
+import numpy as np
+
+SKILL_SET = {'python', 'java', 'c++', 'c#', 'javascript', 'typescript', 'html', 'css', 'sql', 'nosql', 'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring boot', 'git', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'linux', 'unix', 'bash', 'powershell', 'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy', 'matplotlib', 'seaborn', 'tableau', 'power bi', 'excel', 'figma', 'sketch', 'adobe xd', 'jira', 'agile', 'scrum', 'rest api', 'graphql', 'machine learning', 'data analysis', 'data visualization', 'devops', 'ci/cd', 'automation', 'testing', 'selenium'}
+
+# Bit i of a skill bitset stands for SKILL_LIST[i]; sorted so decoded lists come out sorted.
+SKILL_LIST = sorted(SKILL_SET)
+NUM_WORDS = (len(SKILL_LIST) + 63) // 64
+# Bump when SkillMatcher's matching rules change, so bitsets saved with a catalog get rebuilt.
+MATCHING_RULES = 2
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+def _is_boundary(text, i):
+    return i < 0 or i >= len(text) or not _is_word_char(text[i])
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over a skill vocabulary. A single pass over the text
+    finds every skill, and a match only counts when it sits on word boundaries
+    (so 'java' does not fire inside 'javascript'). A skill ending in punctuation
+    needs no boundary after it ('c++' matches 'C++17'), and one ending in a word
+    character may take a plural 's' ('rest api' matches 'REST APIs').
+    """
+    def __init__(self, skills):
+        self.skills = list(skills)
+        self._word_end = [bool(skill) and _is_word_char(skill[-1]) for skill in self.skills]
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for skill_id, skill in enumerate(self.skills):
+            state = 0
+            for ch in skill.lower():
+                if ch not in self.goto[state]:
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append(skill_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find_ids(self, text):
+        text, state, found = str(text).lower(), 0, set()
+        for pos, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for skill_id in self.out[state]:
+                start = pos - len(self.skills[skill_id]) + 1
+                if _is_boundary(text, start - 1) and self._ends_word(text, skill_id, pos):
+                    found.add(skill_id)
+        return found
+
+    def _ends_word(self, text, skill_id, pos):
+        if not self._word_end[skill_id] or _is_boundary(text, pos + 1): return True
+        return text[pos + 1] == 's' and _is_boundary(text, pos + 2)
+
+    def find(self, text):
+        return {self.skills[i] for i in self.find_ids(text)}
+
+    def mask(self, text):
+        """Returns the skills found in `text` as a (NUM_WORDS,) uint64 bitset."""
+        bits = np.zeros(NUM_WORDS, dtype=np.uint64)
+        for skill_id in self.find_ids(text):
+            bits[skill_id // 64] |= np.uint64(1 << (skill_id % 64))
+        return bits
+
+MATCHER = SkillMatcher(SKILL_LIST)
+
+def bits_metadata():
+    """Catalog metadata describing how its skill bitsets were computed."""
+    return {'skill_vocabulary': SKILL_LIST, 'skill_matching': MATCHING_RULES}
+
+def bits_current(metadata):
+    return all(metadata.get(key) == value for key, value in bits_metadata().items())
+
+def skill_bits(texts):
+    """Bitset column for a sequence of texts, shaped (len(texts), NUM_WORDS)."""
+    bits = np.zeros((len(texts), NUM_WORDS), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        bits[row] = MATCHER.mask(text)
+    return bits
+
+def decode_bits(bits):
+    """Sorted list of skill names whose bits are set."""
+    skills = []
+    for word_id, word in enumerate(np.asarray(bits, dtype=np.uint64).tolist()):
+        while word:
+            low = word & -word
+            skills.append(SKILL_LIST[word_id * 64 + low.bit_length() - 1])
+            word ^= low
+    return skills
+
+_SKILL_NAMES = np.array(SKILL_LIST, dtype=object)
+
+def decode_rows(bits):
+    """decode_bits() of every row of a (n, NUM_WORDS) bitset array, with the bits unpacked in one pass."""
+    words = np.ascontiguousarray(bits, dtype='<u8').reshape(-1, NUM_WORDS)
+    flags = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')[:, :len(SKILL_LIST)]
+    names = _SKILL_NAMES[np.nonzero(flags)[1]].tolist()  # row-major, so each row's skills are contiguous and sorted
+    ends = np.cumsum(flags.sum(axis=1)).tolist()
+    return [names[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+def skills_gap(job_bits, user_bits):
+    """Skills the job needs that the user does not have, as a bitset."""
+    return job_bits & ~user_bits
+
+# --- TEXT HELPERS (shared with bm25_index, job_filters and the caches) ---
+def normalize_text(text):
+    """Lowercased with whitespace runs collapsed; the key form of titles, queries and filter values."""
+    return ' '.join(str(text or '').lower().split())
+
+def tokenize(text):
+    return re.findall(r'\b\w+\b', str(text).lower())
@@ -0,0 +1,56 @@
+# startup_report.py
+# Where a cold start of app.py spends its time: per-package import cost (from
+# python -X importtime) and the app's own startup phases, measured in a fresh process.
+#
+#     python startup_report.py --mode background
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in the child process; prints the app's phase timings as the last line of stdout.
+CHILD_SCRIPT = """
+import json, time
+import app
+app.app.test_client().get('/login')
+app.startup_timings['first /login'] = time.perf_counter() - app._import_started
+app.ensure_ai_loaded()
+print(json.dumps(app.startup_timings))
+"""
+
+def parse_importtime(stderr):
+    """Import seconds per top-level package (self time of all its modules), from -X importtime output."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line: continue
+        self_us, _, name = line[len('import time:'):].split('|', 2)
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return totals
+
+def measure(mode):
+    env = dict(os.environ, PATHFINDER_AI_LOAD=mode)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT], env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"App startup failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time and startup-time breakdown of app.py.")
+    parser.add_argument('--mode', choices=['eager', 'background', 'lazy'], default='background')
+    parser.add_argument('--top', type=int, default=15, help="Number of packages to list.")
+    args = parser.parse_args()
+    timings, imports = measure(args.mode)
+
+    print(f"\nSlowest imports by package (PATHFINDER_AI_LOAD={args.mode}):")
+    for name, seconds in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<30} {seconds * 1000:>9.1f} ms")
+    print("\nStartup phases:")
+    for phase in ['import app', 'first /login', 'import sentence_transformers', 'load model', 'load job catalog', 'load course catalog', 'ready']:
+        if phase in timings: print(f"  {phase:<30} {timings[phase]:>9.3f} s")
+    print("\n'import app' and 'first /login' are measured from the start of app.py's imports; 'ready' is when recommendations can be served.")
+
+if __name__ == "__main__":
+    main()
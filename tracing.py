@@ -0,0 +1,187 @@
+# tracing.py
+# Request-level timing spans, per-stage latency histograms in Prometheus text
+# format, and an opt-in sampling profiler for slow requests. With
+# PATHFINDER_TRACING=0, span() returns a shared no-op and nothing is recorded.
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+TRACING_ENABLED = os.environ.get('PATHFINDER_TRACING', '1') != '0'
+# Requests slower than this print their span breakdown (and profile, when profiling is on).
+SLOW_REQUEST_MS = float(os.environ.get('PATHFINDER_SLOW_REQUEST_MS', 1000))
+# Opt-in: sample the stacks of in-flight requests and print the hottest frames of the slow ones.
+PROFILE_SLOW_REQUESTS = os.environ.get('PATHFINDER_PROFILE_SLOW_REQUESTS', '0') == '1'
+PROFILE_INTERVAL = float(os.environ.get('PATHFINDER_PROFILE_INTERVAL_MS', 5)) / 1000
+PROFILE_TOP_FRAMES = 15
+# Histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Metric name -> (label name, help text).
+METRICS = {
+    'pathfinder_request_seconds': ('route', "End-to-end request latency by route."),
+    'pathfinder_stage_seconds': ('stage', "Time spent in each instrumented stage of a request."),
+}
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect plus a few additions under a lock."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bound
+        self.sum, self.count = 0.0, 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1; self.sum += value; self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+_histograms = {}  # (metric, label value) -> Histogram
+_histograms_lock = threading.Lock()
+_local = threading.local()
+
+def histogram(metric, label):
+    h = _histograms.get((metric, label))
+    if h is None:
+        with _histograms_lock: h = _histograms.setdefault((metric, label), Histogram())
+    return h
+
+# --- SPANS ---
+class _Span:
+    __slots__ = ('stage', 'started', 'depth')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.depth = getattr(_local, 'depth', 0)
+        _local.depth = self.depth + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        _local.depth = self.depth
+        histogram('pathfinder_stage_seconds', self.stage).observe(elapsed)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None: trace.append((self.started, self.depth, self.stage, elapsed))
+
+_NOOP_SPAN = nullcontext()
+
+def span(stage):
+    """Times the enclosed block as `stage`: `with tracing.span('encode'): ...`."""
+    return _Span(stage) if TRACING_ENABLED else _NOOP_SPAN
+
+# --- REQUESTS ---
+def begin_request():
+    """Starts collecting this thread's spans; returns the token end_request() needs (None when disabled)."""
+    if not TRACING_ENABLED: return None
+    _local.trace, _local.depth = [], 0
+    if PROFILE_SLOW_REQUESTS: sampler.watch(threading.get_ident())
+    return time.perf_counter()
+
+def end_request(route, started):
+    if started is None: return
+    elapsed = time.perf_counter() - started
+    histogram('pathfinder_request_seconds', route).observe(elapsed)
+    trace, _local.trace = getattr(_local, 'trace', None), None
+    samples = sampler.unwatch(threading.get_ident()) if PROFILE_SLOW_REQUESTS else None
+    if elapsed * 1000 >= SLOW_REQUEST_MS: print_slow_request(route, elapsed, trace or [], samples)
+
+def observe_request(route, seconds):
+    """Records a request timed elsewhere (e.g. the ASGI-native routes, whose work hops between threads)."""
+    if TRACING_ENABLED: histogram('pathfinder_request_seconds', route).observe(seconds)
+
+def print_slow_request(route, elapsed, trace, samples):
+    print(f"Slow request {route}: {elapsed * 1000:.1f} ms")
+    for _, depth, stage, seconds in sorted(trace):
+        print(f"  {'  ' * depth}{stage:<{32 - 2 * depth}} {seconds * 1000:9.1f} ms")
+    if samples: print_profile(samples)
+
+# --- SAMPLING PROFILER ---
+class StackSampler:
+    """
+    Background thread that records the call stack of each watched thread every
+    `interval` seconds. Only runs while some request is being profiled.
+    """
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._watched = {}  # thread id -> {stack (root first): sample count}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, ident):
+        with self._lock:
+            self._watched[ident] = {}
+            self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def unwatch(self, ident):
+        with self._lock:
+            return self._watched.pop(ident, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._watched: self._wake.clear(); continue
+                for ident, counts in self._watched.items():
+                    frame, stack = frames.get(ident), []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    if stack:
+                        stack = tuple(reversed(stack))
+                        counts[stack] = counts.get(stack, 0) + 1
+
+sampler = StackSampler()
+
+def print_profile(samples, top=PROFILE_TOP_FRAMES):
+    """Prints the frames that were on the stack (inclusive) and on top of it (self) in the most samples."""
+    total = sum(samples.values())
+    inclusive, own = {}, {}
+    for stack, count in samples.items():
+        for frame in set(stack): inclusive[frame] = inclusive.get(frame, 0) + count
+        own[stack[-1]] = own.get(stack[-1], 0) + count
+    print(f"  Profile ({total} samples every {sampler.interval * 1000:.0f} ms):  self%  total%")
+    for frame, count in sorted(inclusive.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {own.get(frame, 0) / total:6.1%} {count / total:7.1%}  {frame}")
+
+# --- EXPOSITION ---
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics(gauges=None, counters=None):
+    """
+    All histograms, plus `gauges` and `counters` (name -> number), in the
+    Prometheus text exposition format. Counters get the conventional '_total' suffix.
+    """
+    lines = []
+    with _histograms_lock: histograms = sorted(_histograms.items())
+    for metric, (label_name, help_text) in METRICS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (name, label_value), h in histograms:
+            if name != metric: continue
+            counts, total, count = h.snapshot()
+            label, cumulative = f'{label_name}="{_label(label_value)}"', 0
+            for bound, bucket_count in zip(h.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+            lines += [f'{metric}_sum{{{label}}} {total}', f'{metric}_count{{{label}}} {count}']
+    for name, value in (counters or {}).items():
+        lines += [f"# TYPE {name}_total counter", f"{name}_total {value}"]
+    for name, value in (gauges or {}).items():
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,357 @@
+# vector_index.py
+import time
+import numpy as np
+
+# --- INDEX DEFAULTS ---
+# IVF only pays off once the catalog is large enough that a full scan hurts.
+IVF_MIN_ROWS = 20000
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 15
+KMEANS_SAMPLE_SIZE = 100000
+ASSIGN_BATCH_SIZE = 65536
+# Rows upcast per step when scanning float16/int8 matrices; small enough that each block stays in cache.
+SCAN_BLOCK_ROWS = 4096
+# With a full-precision copy available, quantized search fetches k * RERANK_FACTOR candidates and rescores them.
+RERANK_FACTOR = 4
+# A filtered IVF search allowing at most this many rows skips the index and scores those rows directly.
+FILTER_EXACT_ROWS = 20000
+
+def normalize(vectors):
+    """Returns a float32, L2-normalized copy of a 1-D or 2-D array of vectors."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _top_k(scores, k):
+    """Row-wise top-k of a (q, n) score matrix, sorted best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), np.float32), np.empty((scores.shape[0], 0), np.int64)
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+def _scores(queries, vectors):
+    """queries @ vectors.T; non-float32 (e.g. float16 memmap) matrices are upcast one block at a time."""
+    if isinstance(vectors, Int8Vectors):
+        return vectors.scores(queries)
+    if vectors.dtype == np.float32:
+        return queries @ vectors.T
+    scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+    for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+        scores[:, start:start + len(block)] = queries @ block.T
+    return scores
+
+def _rerank(queries, candidates, rerank_vectors, k):
+    """Rescores each row's candidate ids (-1 = padding) against full-precision vectors and keeps the best k."""
+    k = min(k, candidates.shape[1])
+    all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for row, (query, ids) in enumerate(zip(queries, candidates)):
+        ids = ids[ids >= 0]
+        if len(ids) == 0: continue
+        scores, local = _top_k(query[None, :] @ np.asarray(rerank_vectors[ids], dtype=np.float32).T, k)
+        all_scores[row, :scores.shape[1]] = scores[0]
+        all_ids[row, :scores.shape[1]] = ids[local[0]]
+    return all_scores, all_ids
+
+# --- QUANTIZED VECTORS ---
+class Int8Vectors:
+    """
+    Row-wise int8 quantization of normalized vectors: row i is codes[i] * scales[i].
+    A quarter of the float32 size; scoring upcasts one block of codes at a time
+    and applies the scales to the scores rather than to the codes.
+    """
+    dtype = np.dtype(np.int8)
+
+    def __init__(self, codes, scales):
+        self.codes = codes
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def __getitem__(self, ids):
+        return Int8Vectors(self.codes[ids], self.scales[ids])
+
+    def __array__(self, dtype=None, copy=None):
+        vectors = self.codes.astype(np.float32) * np.asarray(self.scales, dtype=np.float32)[:, None]
+        return vectors if dtype is None else vectors.astype(dtype, copy=False)
+
+    def scores(self, queries):
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            block = self.codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        scores *= self.scales
+        return scores
+
+def quantize_int8(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127
+    safe_scales = np.where(scales > 0, scales, 1.0)
+    codes = np.clip(np.rint(vectors / safe_scales[:, None]), -127, 127).astype(np.int8)
+    return Int8Vectors(codes, scales.astype(np.float32))
+
+def quantize(vectors, dtype):
+    """The storage form of float32 `vectors` for dtype 'float32', 'float16' or 'int8'."""
+    if dtype == 'int8':
+        return quantize_int8(vectors)
+    return np.asarray(vectors, dtype=np.float32).astype(dtype)
+
+def score_ids(vectors, query, ids):
+    """Cosine scores of one query against only the rows in `ids`."""
+    return _scores(normalize(query), vectors[ids])[0]
+
+def in_sorted(values, sorted_ids):
+    """Boolean mask of which `values` occur in the ascending array `sorted_ids`."""
+    if len(sorted_ids) == 0: return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[positions] == values
+
+def search_subset(queries, vectors, ids, k):
+    """Exact top-k of each normalized query over only the rows in `ids`, gathered and scored a block at a time."""
+    best_scores, best_ids = np.empty((len(queries), 0), np.float32), np.empty((len(queries), 0), np.int64)
+    for start in range(0, len(ids), SCAN_BLOCK_ROWS):
+        block = np.asarray(ids[start:start + SCAN_BLOCK_ROWS], dtype=np.int64)
+        scores = np.concatenate([best_scores, _scores(queries, vectors[block])], axis=1)
+        candidates = np.concatenate([best_ids, np.broadcast_to(block, (len(queries), len(block)))], axis=1)
+        best_scores, local = _top_k(scores, k)
+        best_ids = np.take_along_axis(candidates, local, axis=1)
+    return best_scores, best_ids
+
+class ExactIndex:
+    """
+    Brute-force cosine search: one matmul against a pre-normalized matrix. With
+    `rerank_vectors` (float32 copy of quantized `vectors`), the top candidates
+    are rescored in full precision.
+    """
+    kind = 'exact'
+
+    def __init__(self, vectors, normalized=False, rerank_vectors=None, rerank_factor=RERANK_FACTOR):
+        self.vectors = vectors if normalized else normalize(vectors)
+        self.rerank_vectors, self.rerank_factor = rerank_vectors, rerank_factor
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k, allowed=None):
+        """
+        Returns (scores, ids), each shaped (num_queries, k), best match first.
+        `allowed` (ascending row ids) restricts the search to those rows.
+        """
+        queries = normalize(queries)
+        search = (lambda n: _top_k(_scores(queries, self.vectors), n)) if allowed is None else (lambda n: search_subset(queries, self.vectors, allowed, n))
+        if self.rerank_vectors is None:
+            return search(k)
+        _, candidates = search(k * self.rerank_factor)
+        return _rerank(queries, candidates, self.rerank_vectors, k)
+
+    def to_arrays(self):
+        return {}
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are bucketed under their nearest k-means centroid
+    and a query only scans the `nprobe` closest buckets.
+    """
+    kind = 'ivf'
+
+    def __init__(self, vectors, centroids, list_ids, list_offsets, nprobe=DEFAULT_NPROBE, normalized=False,
+                 rerank_vectors=None, rerank_factor=RERANK_FACTOR):
+        self.vectors = vectors if normalized else normalize(vectors)
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.nprobe = nprobe
+        self.rerank_vectors, self.rerank_factor = rerank_vectors, rerank_factor
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, vectors, nlist=None, nprobe=DEFAULT_NPROBE, seed=0, normalized=False, centroids=None):
+        """Trains centroids with k-means, or reuses `centroids` (e.g. from the previous build) and only reassigns."""
+        vectors = vectors if normalized else normalize(vectors)
+        if centroids is None:
+            if nlist is None:
+                nlist = max(1, int(4 * np.sqrt(len(vectors))))
+            nlist = min(nlist, len(vectors))
+            centroids = _train_centroids(vectors, nlist, seed)
+        nlist = len(centroids)
+        assignments = _assign(vectors, centroids)
+        list_ids = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(vectors, centroids, list_ids, list_offsets, nprobe=nprobe, normalized=True)
+
+    def search(self, queries, k, nprobe=None, allowed=None):
+        """Returns (scores, ids) like ExactIndex.search; short rows are padded with id -1."""
+        queries = normalize(queries)
+        if self.rerank_vectors is None:
+            return self._search(queries, k, nprobe, allowed)
+        _, candidates = self._search(queries, k * self.rerank_factor, nprobe, allowed)
+        return _rerank(queries, candidates, self.rerank_vectors, k)
+
+    def _search(self, queries, k, nprobe, allowed=None):
+        if allowed is not None and len(allowed) <= FILTER_EXACT_ROWS:
+            return search_subset(queries, self.vectors, allowed, k)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        if allowed is not None:
+            # Probe proportionally more lists, so about as many allowed rows get scored as in an unfiltered search.
+            nprobe = min(len(self.centroids), int(np.ceil(nprobe * len(self) / max(len(allowed), 1))))
+        _, probes = _top_k(queries @ self.centroids.T, nprobe)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self.list_ids[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists])
+            if allowed is not None: candidates = candidates[in_sorted(candidates, allowed)]
+            if len(candidates) == 0: continue
+            scores, local = _top_k(_scores(query[None, :], self.vectors[candidates]), k)
+            all_scores[row, :scores.shape[1]] = scores[0]
+            all_ids[row, :scores.shape[1]] = candidates[local[0]]
+        return all_scores, all_ids
+
+    def to_arrays(self):
+        return {'centroids': self.centroids, 'list_ids': self.list_ids, 'list_offsets': self.list_offsets}
+
+# --- K-MEANS (spherical, on normalized vectors) ---
+def _assign(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        block = np.asarray(vectors[start:start + ASSIGN_BATCH_SIZE], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def _train_centroids(vectors, nlist, seed):
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > KMEANS_SAMPLE_SIZE:
+        sample = vectors[np.sort(rng.choice(len(vectors), KMEANS_SAMPLE_SIZE, replace=False))]
+    # Memmapped, float16 or int8 vectors: only the (bounded) sample is materialized.
+    sample = np.asarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = _assign(sample, centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+        # Re-seed empty clusters from random points so no bucket is wasted.
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+# --- BUILD / PERSISTENCE ---
+def build_index(vectors, kind=None, nlist=None, nprobe=DEFAULT_NPROBE, centroids=None, normalized=False):
+    """
+    Builds an exact index for small catalogs and an IVF index past IVF_MIN_ROWS.
+    With normalized=True, memory-mapped vectors are only read block by block.
+    """
+    if kind is None:
+        kind = 'ivf' if len(vectors) >= IVF_MIN_ROWS else 'exact'
+    if kind == 'ivf':
+        return IVFIndex.build(vectors, nlist=nlist, nprobe=nprobe, centroids=centroids, normalized=normalized)
+    return ExactIndex(vectors, normalized=normalized)
+
+def save_index(index, path):
+    """Stores only the index structure; the vectors live with the embeddings."""
+    np.savez(path, kind=np.array(index.kind), **index.to_arrays())
+
+def load_index(path, vectors, nprobe=DEFAULT_NPROBE, normalized=False, rerank_vectors=None):
+    """
+    Loads an index saved by save_index, falling back to an exact index if it is
+    missing or stale. Pass normalized=True for pre-normalized (e.g. memmapped)
+    vectors so they are used in place instead of copied, and `rerank_vectors`
+    when `vectors` are quantized and a float32 copy is available.
+    """
+    if not normalized:
+        vectors = normalize(vectors)
+    try:
+        with np.load(path) as data:
+            if str(data['kind']) == 'ivf' and int(data['list_offsets'][-1]) == len(vectors):
+                return IVFIndex(vectors, data['centroids'], data['list_ids'], data['list_offsets'],
+                                nprobe=nprobe, normalized=True, rerank_vectors=rerank_vectors)
+    except (FileNotFoundError, KeyError, TypeError):
+        pass
+    return ExactIndex(vectors, normalized=True, rerank_vectors=rerank_vectors)
+
+# --- RECALL REPORT ---
+def recall_report(index, num_queries=200, k=10, nprobe_values=(1, 2, 4, 8, 16, 32), seed=0):
+    """
+    Measures recall@k and latency of an IVF index against exact search, using
+    a random sample of catalog vectors as queries.
+    """
+    exact = ExactIndex(index.vectors, normalized=True)
+    rng = np.random.default_rng(seed)
+    queries = index.vectors[rng.choice(len(index), min(num_queries, len(index)), replace=False)]
+
+    start = time.perf_counter()
+    _, truth = exact.search(queries, k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    report = []
+    for nprobe in nprobe_values:
+        if nprobe > len(index.centroids): break
+        start = time.perf_counter()
+        _, found = index.search(queries, k, nprobe=nprobe)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        hits = sum(len(np.intersect1d(t, f[f >= 0])) for t, f in zip(truth, found))
+        report.append({'nprobe': nprobe, 'recall': hits / truth.size, 'ms_per_query': ms, 'exact_ms_per_query': exact_ms})
+    return report
+
+def print_recall_report(report, k=10):
+    print(f"  {'nprobe':>6}  {'recall@' + str(k):>10}  {'ms/query':>9}  {'exact ms/query':>14}")
+    for row in report:
+        print(f"  {row['nprobe']:>6}  {row['recall']:>10.3f}  {row['ms_per_query']:>9.3f}  {row['exact_ms_per_query']:>14.3f}")
+
+# --- QUANTIZATION REPORT ---
+def quantization_report(vectors, quantized, num_queries=200, k=10, rerank_factor=RERANK_FACTOR, seed=0):
+    """
+    Ranking agreement of exact search over `quantized` against float32 `vectors`,
+    with and without full-precision rerank. Queries are random weighted mixes of
+    three catalog vectors, so no query trivially finds itself. `mb` counts every
+    matrix a variant keeps, including the float32 copy that rerank reads.
+    """
+    vectors = normalize(vectors)
+    rng = np.random.default_rng(seed)
+    num_queries = min(num_queries, len(vectors))
+    mixes = rng.choice(len(vectors), (num_queries, 3))
+    weights = rng.dirichlet(np.ones(3), num_queries).astype(np.float32)
+    queries = normalize(np.einsum('qm,qmd->qd', weights, vectors[mixes]))
+    variants = [('float32', ExactIndex(vectors, normalized=True)),
+                (f'{quantized.dtype}', ExactIndex(quantized, normalized=True)),
+                (f'{quantized.dtype}+rerank', ExactIndex(quantized, normalized=True, rerank_vectors=vectors, rerank_factor=rerank_factor))]
+    truth = None
+    report = []
+    for name, index in variants:
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        if truth is None: truth = found
+        hits = sum(len(np.intersect1d(t, f[f >= 0])) for t, f in zip(truth, found))
+        mb = (index.vectors.nbytes + (index.rerank_vectors.nbytes if index.rerank_vectors is not None else 0)) / 2**20
+        report.append({'variant': name, 'mb': mb, 'recall': hits / truth.size,
+                       'top1': float(np.mean(found[:, 0] == truth[:, 0])), 'ms_per_query': ms})
+    return report
+
+def print_quantization_report(report, k=10):
+    print(f"  {'variant':>14}  {'MB':>8}  {'recall@' + str(k):>10}  {'top-1':>6}  {'ms/query':>9}")
+    for row in report:
+        print(f"  {row['variant']:>14}  {row['mb']:>8.2f}  {row['recall']:>10.3f}  {row['top1']:>6.3f}  {row['ms_per_query']:>9.3f}")